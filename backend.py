@@ -0,0 +1,2691 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+import requests
+import os
+import json
+import math
+import csv
+import io
+import hashlib
+import functools
+import contextlib
+import fnmatch
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from dotenv import load_dotenv
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+# Optional faster decoders and binary formats, used when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Load environment variables from .env file
+load_dotenv()
+
+def attach_script_run_ctx(func):
+    """
+    Wrap `func` to run with the calling script run's context, for submitting to a thread pool
+    The worker only holds the context for that one call, so long-lived pools
+    shared by all sessions never keep a session's context. Without a current
+    run (cache warm-up, export.py) `func` is returned unchanged.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return func
+    
+    @functools.wraps(func)
+    def run_with_ctx(*args, **kwargs):
+        thread = threading.current_thread()
+        previous = getattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+        add_script_run_ctx(thread, ctx)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+    return run_with_ctx
+
+# ============================================================================
+# CIRCUIT BREAKERS
+# ============================================================================
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while an upstream's circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker
+    Opens after `failure_threshold` consecutive failures and fails fast until
+    `reset_timeout` seconds have passed, then lets a single half-open probe through.
+    Also keeps the last good result per key so callers can serve it while degraded.
+    Snapshots are charged to the shared DataCache budget; beyond `max_snapshot_bytes`
+    the oldest are dropped.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=30, max_snapshot_bytes=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_snapshot_bytes = max_snapshot_bytes
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.snapshots = {}
+        self.snapshot_bytes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """One of "closed", "open" or "half-open" """
+        if self.opened_at is None:
+            return "closed"
+        if self.probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    @property
+    def degraded(self):
+        """True while the most recent request(s) to this upstream failed"""
+        return self.failures > 0
+
+    def allow_request(self):
+        """Return True if a request may be sent now"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing:
+                # Only one half-open probe at a time
+                return False
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def remember(self, key, value):
+        """Store the last good result for `key`"""
+        size = estimate_size(value)
+        # One result larger than the whole bound would only push out every other snapshot
+        if self.max_snapshot_bytes and size > self.max_snapshot_bytes:
+            return
+        with self._lock:
+            self.snapshots.pop(key, None)
+            self.snapshots[key] = (value, datetime.now())
+            self.snapshot_bytes[key] = size
+            # Snapshots are kept in the order they were taken, oldest first
+            while self.max_snapshot_bytes and len(self.snapshots) > 1 and sum(self.snapshot_bytes.values()) > self.max_snapshot_bytes:
+                oldest = next(iter(self.snapshots))
+                del self.snapshots[oldest], self.snapshot_bytes[oldest]
+            get_data_cache().charge(f"{self.name} snapshots", sum(self.snapshot_bytes.values()))
+
+    def last_snapshot(self, key):
+        """Return (value, fetched_at) for `key`, or None if nothing was stored"""
+        return self.snapshots.get(key)
+
+
+@st.cache_resource(show_spinner=False)
+def get_circuit_breakers():
+    """
+    Circuit breakers shared by all sessions, one per upstream service
+    Held in cache_resource so their state survives script reruns
+    """
+    max_snapshot_bytes = store_budget("snapshots")
+    return {
+        "api": CircuitBreaker("S003 API", max_snapshot_bytes=max_snapshot_bytes),
+        "glances": CircuitBreaker("Glances", max_snapshot_bytes=max_snapshot_bytes),
+        "ntfy": CircuitBreaker("ntfy.sh", max_snapshot_bytes=max_snapshot_bytes),
+        "weather": CircuitBreaker("Open-Meteo", max_snapshot_bytes=max_snapshot_bytes),
+    }
+
+
+def guarded_request(breaker, method, url, session=None, **kwargs):
+    """
+    Send a request through a circuit breaker
+    Raises CircuitOpenError without touching the network while the circuit is open.
+    Connection errors and 5xx responses count as failures.
+    Pass a requests.Session to reuse its pooled connections.
+    """
+    if not breaker.allow_request():
+        raise CircuitOpenError(f"{breaker.name} unavailable (circuit {breaker.state})")
+    
+    try:
+        response = (session or requests).request(method, url, **kwargs)
+    except requests.exceptions.RequestException:
+        breaker.record_failure()
+        raise
+    
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+def show_degraded_notice(upstream, has_last_known):
+    """
+    Show a warning when an upstream is failing
+    `has_last_known` says whether the caller is showing last known data or has nothing to show
+    """
+    breaker = get_circuit_breakers()[upstream]
+    if not breaker.degraded:
+        return
+    if has_last_known:
+        st.warning(f"⚠️ {breaker.name} is unreachable (circuit {breaker.state}) - showing last known data.")
+    else:
+        st.warning(f"⚠️ {breaker.name} is unreachable (circuit {breaker.state}) - no data is available until it recovers.")
+
+# ============================================================================
+# RESPONSE DECODING
+# ============================================================================
+
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+def decode_json(content):
+    """Parse JSON bytes with orjson when installed, falling back to the standard library"""
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN literals, which only the standard library accepts
+    return json.loads(content)
+
+def telemetry_accept_header():
+    """
+    Accept header for telemetry requests, listing the binary formats that can be decoded here
+    JSON is always accepted; gzip is negotiated separately by requests (Accept-Encoding)
+    """
+    formats = []
+    if pa is not None:
+        formats.append(ARROW_STREAM_TYPE)
+    if msgpack is not None:
+        formats.append(MSGPACK_TYPES[0])
+    formats.append("application/json;q=0.9" if formats else "application/json")
+    return ", ".join(formats)
+
+def decode_body(response):
+    """
+    Decode a response body according to its Content-Type
+    Arrow IPC streams become a pyarrow Table, msgpack and JSON become Python objects
+    """
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type == ARROW_STREAM_TYPE and pa is not None:
+        return pa.ipc.open_stream(response.content).read_all()
+    if content_type in MSGPACK_TYPES and msgpack is not None:
+        return msgpack.unpackb(response.content)
+    return decode_json(response.content)
+
+def telemetry_frame(telemetry):
+    """
+    Convert decoded telemetry into one columnar DataFrame
+    Accepts a list of {timestamp, payload} records or a pyarrow Table with a
+    timestamp column and either a payload struct or flat metric columns
+    Returns a DataFrame with a UTC `timestamp` column and one column per payload metric
+    """
+    if pa is not None and isinstance(telemetry, pa.Table):
+        if "payload" in telemetry.column_names and pa.types.is_struct(telemetry.schema.field("payload").type):
+            telemetry = telemetry.flatten()
+            telemetry = telemetry.rename_columns([name.removeprefix("payload.") for name in telemetry.column_names])
+        frame = telemetry.to_pandas()
+        if frame.empty:
+            return pd.DataFrame()
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True, format="ISO8601")
+        return frame
+    
+    if not telemetry:
+        return pd.DataFrame()
+    
+    frame = pd.DataFrame.from_records([record.get('payload') or {} for record in telemetry])
+    frame.insert(0, "timestamp", pd.to_datetime(
+        [record['timestamp'] for record in telemetry], utc=True, format="ISO8601"
+    ))
+    return frame
+
+# ============================================================================
+# CONDITIONAL REQUESTS
+# ============================================================================
+
+class ConditionalCache:
+    """
+    Validators and decoded bodies of recent GET responses, keyed by full URL
+    Lets conditional_get revalidate with If-None-Match / If-Modified-Since and
+    reuse the decoded object on a 304. Bodies are also hashed, so an unchanged
+    200 from a backend that sends no validators is not decoded again.
+    The least recently used entries are dropped beyond `max_entries` or
+    `max_bytes`; the bytes held are charged to the shared DataCache budget.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.reused = 0  # responses served from a stored entry
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        if "bytes" not in entry:
+            entry["bytes"] = estimate_size(entry["data"])
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old:
+                self.used_bytes -= old["bytes"]
+            self.entries[key] = entry
+            self.used_bytes += entry["bytes"]
+            while len(self.entries) > 1 and (len(self.entries) > self.max_entries
+                                             or (self.max_bytes and self.used_bytes > self.max_bytes)):
+                self.used_bytes -= self.entries.popitem(last=False)[1]["bytes"]
+            get_data_cache().charge("conditional requests", self.used_bytes)
+
+    def record_reuse(self):
+        with self._lock:
+            self.reused += 1
+
+
+@st.cache_resource(show_spinner=False)
+def get_conditional_cache():
+    """Conditional request cache shared by all sessions"""
+    return ConditionalCache(max_bytes=store_budget("conditional requests"))
+
+
+def conditional_get(breaker, url, decode=None, params=None, accept=None, remember=True, timeout=10):
+    """
+    GET a resource, revalidating the copy kept in ConditionalCache
+    The body is parsed by decode_body, so `accept` can offer binary formats.
+    `decode` turns the parsed body into the object the caller keeps, and only
+    runs when the body changed. Returned data is shared, so treat it as read-only.
+    With remember=False nothing is revalidated or stored, for one-off bodies
+    that should not be held in memory.
+    Returns tuple: (status_code: int, data)
+    A 304, or a 200 with the same body hash as last time, returns 200 with the
+    stored data. data is None for any status other than 200.
+    """
+    cache = get_conditional_cache()
+    key = requests.Request("GET", url, params=params).prepare().url
+    entry = cache.get(key) if remember else None
+    
+    headers = {"Accept": accept} if accept else {}
+    if entry and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+    
+    response = guarded_request(breaker, "GET", url, params=params, headers=headers, timeout=timeout)
+    
+    if response.status_code == 304 and entry:
+        cache.record_reuse()
+        return (200, entry["data"])
+    if response.status_code != 200:
+        return (response.status_code, None)
+    
+    digest = hashlib.blake2b(response.content, digest_size=16).digest()
+    size = None
+    if entry and entry["digest"] == digest:
+        cache.record_reuse()
+        data, size = entry["data"], entry["bytes"]
+    else:
+        data = decode_body(response)
+        if decode:
+            data = decode(data)
+    
+    if not remember:
+        return (200, data)
+    entry = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "digest": digest,
+        "data": data,
+    }
+    if size is not None:
+        entry["bytes"] = size
+    cache.put(key, entry)
+    return (200, data)
+
+# ============================================================================
+# RESULT CACHE
+# ============================================================================
+
+# Total size of all cached data: function results plus the stores below
+DATA_CACHE_BUDGET = int(float(os.environ.get('CACHE_BUDGET_MB', '256')) * 1024 * 1024)
+# Most of the budget any one store outside DataCache may hold; each charges what
+# it holds to DataCache, which evicts results to keep the total in budget
+STORE_BUDGET_SHARES = {
+    "conditional requests": 0.2,
+    "rollups": 0.2,
+    "weather": 0.02,
+    "snapshots": 0.02,  # per circuit breaker
+}
+
+def store_budget(store):
+    """Byte bound for one store outside DataCache (see STORE_BUDGET_SHARES)"""
+    return int(DATA_CACHE_BUDGET * STORE_BUDGET_SHARES[store])
+
+def estimate_size(value):
+    """Approximate bytes held by a stored object: DataFrames are measured directly, anything else by its pickled size"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+class DataCache:
+    """
+    Byte-budgeted LRU cache shared by every @cached function
+    Results are stored pickled, so each entry's size is known exactly and every
+    caller gets its own copy, as with st.cache_data. Once the total exceeds
+    `budget_bytes`, the least recently used entries are evicted, whichever
+    function they belong to. Stores that keep data outside DataCache report
+    their size through charge(), and it counts against the same budget.
+    Misses are single-flight: while one caller computes a key, others asking
+    for the same key wait for that result instead of computing it again.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()  # key -> (pickled result, expires_at)
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.in_flight = {}  # key -> Future of the pickled result
+        self.deduplicated = 0
+        self.stores = {}  # store name -> bytes held outside DataCache
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (True, result) for a fresh entry, or (False, None)"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return (False, None)
+            
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return (True, pickle.loads(entry[0]))
+
+    def put(self, key, result, ttl):
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._store(key, data, time.monotonic() + ttl)
+
+    def get_or_load(self, key, load, ttl):
+        """
+        Return the cached result for `key`, or call load() once to fill it
+        Concurrent misses for the same key share one load() call; the callers
+        that waited are counted in `deduplicated`
+        """
+        found, result = self.get(key)
+        if found:
+            return result
+        
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] >= time.monotonic():
+                # A leader stored the result between the miss above and taking the lock
+                self.entries.move_to_end(key)
+                future = None
+            else:
+                future = self.in_flight.get(key)
+                leader = future is None
+                if leader:
+                    future = self.in_flight[key] = Future()
+                else:
+                    self.deduplicated += 1
+        
+        if future is None:
+            return pickle.loads(entry[0])
+        if not leader:
+            # Unpickle a copy, so waiting callers cannot modify each other's results
+            return pickle.loads(future.result())
+        
+        try:
+            result = load()
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                self._store(key, data, time.monotonic() + ttl)
+            future.set_result(data)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self.in_flight[key]
+
+    def _store(self, key, data, expires_at):
+        """Insert or replace an entry as most recently used, then evict down to the budget (lock held)"""
+        if key in self.entries:
+            self._remove(key)
+        # A result larger than the whole budget would only evict everything else
+        if len(data) > self.budget_bytes:
+            return
+        
+        self.entries[key] = (data, expires_at)
+        self.used_bytes += len(data)
+        self._evict()
+
+    def _evict(self):
+        """Evict the least recently used entries until results and stores fit the budget (lock held)"""
+        while self.entries and self.used_bytes + sum(self.stores.values()) > self.budget_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def charge(self, store, nbytes):
+        """Record that `store` now holds `nbytes` outside DataCache, evicting results to make room"""
+        with self._lock:
+            self.stores[store] = nbytes
+            self._evict()
+
+    def update(self, key, change):
+        """Replace a fresh entry's result with change(result), keeping its expiry; missing entries are left alone"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return False
+            data = pickle.dumps(change(pickle.loads(entry[0])), protocol=pickle.HIGHEST_PROTOCOL)
+            self._store(key, data, entry[1])
+            return key in self.entries
+
+    def _remove(self, key):
+        data, expires_at = self.entries.pop(key)
+        self.used_bytes -= len(data)
+
+    def clear(self, name=None):
+        """Drop every entry, or only those of the function called `name`"""
+        with self._lock:
+            for key in [key for key in self.entries if name is None or key[0] == name]:
+                self._remove(key)
+
+    def stats(self):
+        """
+        Return current usage and hit, miss, eviction and deduplicated call counts
+        used_bytes covers results and stores; `stores` breaks it down by holder
+        """
+        with self._lock:
+            return {
+                "entries": len(self.entries),
+                "used_bytes": self.used_bytes + sum(self.stores.values()),
+                "stores": {"results": self.used_bytes, **self.stores},
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "deduplicated": self.deduplicated,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_data_cache():
+    """Result cache shared by all sessions and all @cached functions"""
+    return DataCache(DATA_CACHE_BUDGET)
+
+
+def cached(ttl):
+    """
+    Cache a function's results in the shared DataCache for `ttl` seconds
+    Used instead of st.cache_data so all cached functions share one memory budget
+    Arguments must be hashable; they form the cache key with the function name
+    Concurrent calls with the same arguments run the function only once
+    """
+    def decorator(func):
+        def cache_key(args, kwargs):
+            return (func.__qualname__, args, tuple(sorted(kwargs.items())))
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_data_cache().get_or_load(cache_key(args, kwargs), lambda: func(*args, **kwargs), ttl)
+        
+        # Same as st.cache_data: fetch_x.clear() drops that function's results
+        wrapper.clear = lambda: get_data_cache().clear(func.__qualname__)
+        # fetch_x.update(change, *args) edits one cached result in place after a write
+        wrapper.update = lambda change, *args, **kwargs: get_data_cache().update(cache_key(args, kwargs), change)
+        return wrapper
+    return decorator
+
+# ============================================================================
+# FLEET HEALTH
+# ============================================================================
+
+# A device is Active while its newest record is at most this old, unless its
+# configuration sets "active_threshold_minutes"
+DEFAULT_ACTIVE_THRESHOLD = timedelta(hours=1)
+# A step between records longer than this many reporting intervals is a gap
+HEARTBEAT_GAP_FACTOR = 3
+
+def device_health_settings(configuration):
+    """
+    Health thresholds for one device, read from its configuration
+    Returns dict: active_threshold (seconds, from "active_threshold_minutes") and
+    report_interval (seconds, from "report_interval", or None if not set)
+    """
+    def positive_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+    
+    configuration = configuration if isinstance(configuration, dict) else {}
+    minutes = configuration.get("active_threshold_minutes")
+    interval = configuration.get("report_interval")
+    return {
+        "active_threshold": minutes * 60 if positive_number(minutes) else DEFAULT_ACTIVE_THRESHOLD.total_seconds(),
+        "report_interval": interval if positive_number(interval) else None,
+    }
+
+def classify_fleet_health(last_seen, thresholds, now=None):
+    """
+    Classify every device as Active, Inactive or Unknown in one vectorized pass
+    `last_seen` holds each device's newest record time (None when unknown) and
+    `thresholds` its active threshold in seconds, in the same order
+    Returns a NumPy array of status strings
+    """
+    last_seen_ns = pd.to_datetime(list(last_seen), utc=True).as_unit("ns").asi8
+    threshold_ns = (np.asarray(thresholds, dtype=float) * 1e9).astype(np.int64)
+    now_ns = (pd.Timestamp.now(tz="UTC") if now is None else to_utc(now)).as_unit("ns").value
+    
+    unknown = last_seen_ns == pd.NaT.value
+    active = (now_ns - last_seen_ns) <= threshold_ns
+    return np.where(unknown, "Unknown", np.where(active, "Active", "Inactive"))
+
+def with_fleet_status(rows, now=None):
+    """Copies of device rows (from fetch_device_details) with STATUS filled in by one classify_fleet_health pass"""
+    statuses = classify_fleet_health(
+        [row["LAST_SEEN"] for row in rows], [row["ACTIVE_THRESHOLD"] for row in rows], now
+    )
+    return [dict(row, STATUS=str(status)) for row, status in zip(rows, statuses)]
+
+def heartbeat_gaps(timestamps, expected_interval=None, start_time=None, end_time=None):
+    """
+    Find reporting gaps in a device's record times and estimate its uptime
+    Steps between consecutive times come from np.diff; a step longer than
+    HEARTBEAT_GAP_FACTOR expected intervals is a gap. The expected interval is
+    `expected_interval` seconds when known, otherwise the median step.
+    When given, `start_time` and `end_time` bound the window, so silence at
+    either end counts as a gap too.
+    
+    Returns:
+        dict: gaps (DataFrame of start, end, duration, longest first), uptime
+        (fraction of the window not in a gap, or None if it cannot be estimated)
+        and expected_interval (seconds, or None)
+    """
+    times = pd.DatetimeIndex(timestamps)
+    if times.tz is None:
+        times = times.tz_localize(datetime.now().astimezone().tzinfo)
+    tz = times.tz
+    records = np.sort(times.tz_convert("UTC").as_unit("ns").asi8)
+    start_ns = to_utc(start_time).as_unit("ns").value if start_time is not None else None
+    end_ns = to_utc(end_time).as_unit("ns").value if end_time is not None else None
+    if start_ns is not None:
+        records = records[records >= start_ns]
+    if end_ns is not None:
+        records = records[records <= end_ns]
+    
+    record_steps = np.diff(records)
+    points = np.concatenate([[start_ns] if start_ns is not None else [], records,
+                             [end_ns] if end_ns is not None else []]).astype(np.int64)
+    steps = np.diff(points)
+    if expected_interval is not None:
+        expected_ns = expected_interval * 1e9
+    elif len(record_steps):
+        expected_ns = float(np.median(record_steps))
+    else:
+        expected_ns = None
+    
+    no_gaps = pd.DataFrame({"start": pd.DatetimeIndex([], tz=tz), "end": pd.DatetimeIndex([], tz=tz),
+                            "duration": pd.to_timedelta([])})
+    if expected_ns is None or not len(steps) or points[-1] <= points[0]:
+        return {"gaps": no_gaps, "uptime": None, "expected_interval": None}
+    
+    is_gap = steps > expected_ns * HEARTBEAT_GAP_FACTOR
+    gap_steps = steps[is_gap]
+    gaps = pd.DataFrame({
+        "start": pd.to_datetime(points[:-1][is_gap], utc=True).tz_convert(tz),
+        "end": pd.to_datetime(points[1:][is_gap], utc=True).tz_convert(tz),
+        "duration": pd.to_timedelta(gap_steps),
+    }).sort_values("duration", ascending=False, ignore_index=True)
+    return {
+        "gaps": gaps,
+        "uptime": float(1 - gap_steps.sum() / (points[-1] - points[0])),
+        "expected_interval": expected_ns / 1e9,
+    }
+
+# ============================================================================
+# API INTEGRATION FUNCTIONS (TO BE IMPLEMENTED)
+# ============================================================================
+
+# Home site used for the dashboard banner and for devices without coordinates
+DEFAULT_WEATHER_SITE = {
+    "name": os.environ.get('WEATHER_LOCATION', 'Banya'),
+    "latitude": float(os.environ.get('WEATHER_LATITUDE', '-26.829099')),
+    "longitude": float(os.environ.get('WEATHER_LONGITUDE', '153.043996')),
+}
+# Sites closer together than this share one forecast grid cell (about 11 km)
+WEATHER_GRID_DEGREES = 0.1
+
+WMO_CODES = {
+    0: "Clear Sky",
+    1: "Mainly Clear",
+    2: "Partly Cloudy",
+    3: "Overcast",
+    45: "Fog",
+    51: "Drizzle",
+    61: "Slight Rain",
+    80: "Rain Showers"
+}
+
+def weather_cell(latitude, longitude):
+    """Snap coordinates to the forecast grid cell they fall in"""
+    return (
+        round(round(latitude / WEATHER_GRID_DEGREES) * WEATHER_GRID_DEGREES, 4),
+        round(round(longitude / WEATHER_GRID_DEGREES) * WEATHER_GRID_DEGREES, 4),
+    )
+
+def get_device_site(configuration):
+    """
+    Weather site for a device configuration
+    Uses the configuration's latitude/longitude when present, otherwise the home site
+    """
+    configuration = configuration or {}
+    try:
+        return {
+            "name": configuration.get('location', DEFAULT_WEATHER_SITE["name"]),
+            "latitude": float(configuration['latitude']),
+            "longitude": float(configuration['longitude']),
+        }
+    except (KeyError, TypeError, ValueError):
+        return DEFAULT_WEATHER_SITE
+
+def request_weather(cells):
+    """
+    Fetch current conditions and the hourly forecast for several grid cells
+    All cells go into one multi-coordinate Open-Meteo request
+    Returns {cell: {"current": dict, "hourly": DataFrame}}, empty on failure
+    """
+    endpoint = os.environ.get('WEATHER_ENDPOINT', 'https://api.open-meteo.com')
+    url = f"{endpoint}/v1/forecast"
+    breaker = get_circuit_breakers()["weather"]
+
+    params = {
+        "latitude": ",".join(str(latitude) for latitude, longitude in cells),
+        "longitude": ",".join(str(longitude) for latitude, longitude in cells),
+        "current": "temperature_2m,relative_humidity_2m,precipitation,weather_code,wind_speed_10m",
+        "hourly": "temperature_2m,rain",
+        "timezone": "auto",
+        "models": "best_match" # OPTIONAL: Explicitly requests BOM's model
+    }
+
+    try:
+        response = guarded_request(breaker, "GET", url, params=params, timeout=5)
+
+        if response.status_code == 200:
+            data = decode_json(response.content)
+            # A single location comes back as an object, several as a list in request order
+            if isinstance(data, dict):
+                data = [data]
+
+            weather = {}
+            for cell, location in zip(cells, data):
+                hourly = location.get('hourly', {})
+                weather[cell] = {
+                    "current": location.get('current', {}),
+                    "hourly": pd.DataFrame({
+                        "time": pd.to_datetime(hourly.get('time', [])),
+                        "temperature": hourly.get('temperature_2m', []),
+                        "rain": hourly.get('rain', []),
+                    }),
+                }
+            return weather
+        else:
+            print(f"Error fetching data: Status code {response.status_code}")
+
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching weather data: {e}")
+    except Exception as e:
+        print(f"Error processing weather data: {e}")
+
+    return {}
+
+class WeatherCache:
+    """
+    Weather per forecast grid cell, shared by all sessions
+    Missing or expired cells are fetched together in one request; if that fails
+    the previous data for each cell keeps being served. Cells are charged to the
+    shared DataCache budget; beyond `max_bytes` the least recently fetched are dropped.
+    """
+
+    def __init__(self, ttl=300, max_bytes=None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cells = {}  # cell -> (fetched_at, weather, bytes), oldest fetch first
+        self._lock = threading.Lock()
+
+    def get(self, cells):
+        """Return {cell: weather} for the requested cells that have data"""
+        now = time.monotonic()
+        with self._lock:
+            stale = [cell for cell in cells
+                     if cell not in self.cells or now - self.cells[cell][0] >= self.ttl]
+
+        if stale:
+            fetched = {cell: (now, weather, estimate_size(weather)) for cell, weather in request_weather(stale).items()}
+            with self._lock:
+                for cell, entry in fetched.items():
+                    self.cells.pop(cell, None)
+                    self.cells[cell] = entry
+                used = sum(entry[2] for entry in self.cells.values())
+                while self.max_bytes and len(self.cells) > 1 and used > self.max_bytes:
+                    used -= self.cells.pop(next(iter(self.cells)))[2]
+                get_data_cache().charge("weather", used)
+
+        with self._lock:
+            return {cell: self.cells[cell][1] for cell in cells if cell in self.cells}
+
+
+@st.cache_resource(show_spinner=False)
+def get_weather_cache():
+    """Weather cache shared by all sessions (cached for 5 minutes per cell)"""
+    return WeatherCache(ttl=300, max_bytes=store_budget("weather"))
+
+def fetch_site_weather(sites):
+    """
+    Fetch weather for several sites at once
+    Sites in the same grid cell are merged, so this makes at most one request
+    however many sites or devices are passed
+    Returns a list of weather dicts in the same order as `sites`
+    """
+    site_cells = [weather_cell(site["latitude"], site["longitude"]) for site in sites]
+    weather_by_cell = get_weather_cache().get(sorted(set(site_cells)))
+
+    results = []
+    for site, cell in zip(sites, site_cells):
+        weather = weather_by_cell.get(cell)
+        if weather:
+            current = weather["current"]
+            results.append({
+                "temperature": current.get('temperature_2m', '--'),
+                "condition": WMO_CODES.get(current.get('weather_code', 0), "--"),
+                "wind_speed": current.get('wind_speed_10m', '--'),
+                "precipitation": current.get('precipitation', '--'),
+                "humidity": current.get('relative_humidity_2m', '--'),
+                "location": site["name"],
+                "hourly": weather["hourly"],
+            })
+        else:
+            # Return default values if API call fails
+            results.append({
+                "temperature": "--",
+                "condition": "--",
+                "wind_speed": "--",
+                "precipitation": "--",
+                "humidity": "--",
+                "location": site["name"],
+                "hourly": pd.DataFrame(),
+            })
+    return results
+
+def fetch_weather_data():
+    """
+    Fetch weather data for the home site (DEFAULT_WEATHER_SITE)
+    Served from the shared per-cell weather cache
+    """
+    return fetch_site_weather([DEFAULT_WEATHER_SITE])[0]
+
+
+class NotificationFeed:
+    """
+    Background subscription to an ntfy.sh topic
+    Keeps the most recent messages in memory so the notifications panel can
+    redraw as they arrive without polling ntfy.sh on every rerun
+    """
+
+    def __init__(self, topic, breaker, max_messages=50, reconnect_delay=5):
+        self.url = f"https://ntfy.sh/{topic}/json"
+        self.breaker = breaker
+        self.reconnect_delay = reconnect_delay
+        self.messages = deque(maxlen=max_messages)
+        self.last_id = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="ntfy-feed", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                # Resume after the last message seen so reconnects do not replay history
+                response = guarded_request(
+                    self.breaker, "GET", self.url,
+                    params={"since": self.last_id or "latest"},
+                    stream=True,
+                    timeout=(5, 90)  # ntfy sends a keepalive every 45 seconds
+                )
+                
+                if response.status_code == 200:
+                    for line in response.iter_lines():
+                        if line:
+                            self._add(decode_json(line))
+                else:
+                    print(f"Error subscribing to notifications: Status code {response.status_code}")
+            
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching notifications: {e}")
+            except Exception as e:
+                print(f"Error processing notifications: {e}")
+            
+            time.sleep(self.reconnect_delay)
+
+    def _add(self, message):
+        # Skip open/keepalive events, only real messages are shown
+        if message.get('event', 'message') != 'message':
+            return
+        with self._lock:
+            self.messages.append(message)
+            self.last_id = message.get('id', self.last_id)
+
+    def snapshot(self):
+        """Return the buffered messages, oldest first"""
+        with self._lock:
+            return list(self.messages)
+
+
+@st.cache_resource(show_spinner=False)
+def get_notification_feed():
+    """ntfy.sh subscription shared by all sessions"""
+    # Get topic from environment variable or use default
+    topic = os.environ.get('NTFY_TOPIC', 'washingLineMonitor')
+    return NotificationFeed(topic, get_circuit_breakers()["ntfy"])
+
+def fetch_notifications():
+    """
+    Fetch recent notifications from the ntfy.sh feed
+    Returns a DataFrame with TIMESTAMP, TITLE, MESSAGE, DEVICE ID columns
+    Messages are collected in the background by NotificationFeed, so this makes no requests
+    """
+    notifications = get_notification_feed().snapshot()
+    
+    # Convert to DataFrame format
+    df_data = {
+        "TIMESTAMP": [],
+        "TITLE": [],
+        "MESSAGE": [],
+        "DEVICE ID": []
+    }
+    
+    for notif in notifications:
+        # Convert Unix timestamp to readable format
+        timestamp = datetime.fromtimestamp(notif.get('time', 0))
+        df_data["TIMESTAMP"].append(timestamp.strftime("%Y-%m-%d %H:%M:%S"))
+        df_data["TITLE"].append(notif.get('title', 'N/A'))
+        df_data["MESSAGE"].append(notif.get('message', ''))
+        # Try to extract device ID from message if present
+        message = notif.get('message', '')
+        device_id = "--"
+        if "Device " in message:
+            # Extract device ID from message like "Device device_001 reported..."
+            parts = message.split("Device ")
+            if len(parts) > 1:
+                device_id = parts[1].split()[0]
+        df_data["DEVICE ID"].append(device_id)
+    
+    return pd.DataFrame(df_data)
+
+@cached(ttl=10)  # Cache for 10 seconds
+def fetch_system_metrics():
+    """
+    Fetch real-time system metrics from Glances API
+    Returns dict with disk, memory, and CPU metrics
+    Cached for 10 seconds to reduce API calls
+    """
+    endpoint = os.environ.get('GLANCES_ENDPOINT', 'http://localhost:61208')
+    url = f"{endpoint}/api/4/all"
+    breaker = get_circuit_breakers()["glances"]
+    
+    try:
+        response = guarded_request(breaker, "GET", url, timeout=5)
+        
+        if response.status_code == 200:
+            data = decode_json(response.content)
+            
+            # Extract disk metrics (first filesystem)
+            fs_list = data.get('fs', [])
+            disk_info = fs_list[0] if fs_list else {}
+            disk_size_gb = disk_info.get('size', 0) / (1024**3)
+            disk_percent = disk_info.get('percent', 0)
+            
+            # Extract memory metrics
+            mem = data.get('mem', {})
+            mem_total_gb = mem.get('total', 0) / (1024**3)
+            mem_percent = mem.get('percent', 0)
+            
+            # Extract CPU metrics
+            cpu = data.get('cpu', {})
+            cpu_percent = cpu.get('total', 0)
+            
+            metrics = {
+                "disk": {
+                    "percentage": disk_percent,
+                    "total_gb": disk_size_gb
+                },
+                "memory": {
+                    "percentage": mem_percent,
+                    "total_gb": mem_total_gb
+                },
+                "cpu": {
+                    "percentage": cpu_percent
+                }
+            }
+            breaker.remember("metrics", metrics)
+            return metrics
+    
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching Glances data: {e}")
+    except Exception as e:
+        print(f"Error processing Glances data: {e}")
+    
+    # Serve the last known metrics while Glances is failing
+    snapshot = breaker.last_snapshot("metrics")
+    if snapshot and breaker.degraded:
+        return snapshot[0]
+    
+    # Return default values on failure
+    return {
+        "disk": {"percentage": 0, "total_gb": 0},
+        "memory": {"percentage": 0, "total_gb": 0},
+        "cpu": {"percentage": 0}
+    }
+
+@cached(ttl=30)  # Cache for 30 seconds
+def fetch_device_count():
+    """
+    Fetch total device count from API
+    Returns the number of registered devices
+    Cached for 30 seconds to reduce API calls
+    """
+    endpoint = os.environ.get('API_ENDPOINT', 'http://127.0.0.1:8000/')
+    print(f"API_ENDPOINT: {endpoint}")
+    url = f"{endpoint}/api/v1/devices"
+    breaker = get_circuit_breakers()["api"]
+    
+    try:
+        response = guarded_request(breaker, "GET", url, timeout=10)
+        
+        if response.status_code == 200:
+            devices = decode_json(response.content)
+            breaker.remember("device_count", len(devices))
+            return len(devices)
+    
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching device count: {e}")
+    except Exception as e:
+        print(f"Error processing device count: {e}")
+    
+    # Serve the last known count while the API is failing
+    snapshot = breaker.last_snapshot("device_count")
+    if snapshot and breaker.degraded:
+        return snapshot[0]
+    
+    # Return 0 on failure
+    return 0
+
+def create_device(device_id, configuration, session=None):
+    """
+    Create a new device via the API
+    Returns tuple: (success: bool, message: str, status_code: int)
+    """
+    endpoint = os.environ.get('API_ENDPOINT', 'http://127.0.0.1:8000/')
+    url = f"{endpoint}/api/v1/devices"
+    
+    try:
+        payload = {
+            "device_id": device_id,
+            "configuration": configuration
+        }
+        
+        response = guarded_request(get_circuit_breakers()["api"], "POST", url, session=session, json=payload, timeout=10)
+        
+        if response.status_code == 201:
+            return (True, f"Device '{device_id}' created successfully!", 201)
+        elif response.status_code == 409:
+            return (False, f"Device '{device_id}' already exists.", 409)
+        elif response.status_code == 400:
+            return (False, "Invalid request format. Please check your inputs.", 400)
+        else:
+            return (False, f"Unexpected error: Status code {response.status_code}", response.status_code)
+    
+    except requests.exceptions.RequestException as e:
+        return (False, f"Network error: {str(e)}", 0)
+    except Exception as e:
+        return (False, f"Error creating device: {str(e)}", 0)
+
+@cached(ttl=60)  # Cache for 60 seconds
+def fetch_device_config(device_id):
+    """
+    Fetch device configuration from API
+    Returns tuple: (success: bool, configuration: dict, message: str)
+    Cached for 60 seconds to reduce API calls
+    """
+    endpoint = os.environ.get('API_ENDPOINT', 'http://127.0.0.1:8000/')
+    url = f"{endpoint}/api/v1/devices/{device_id}"
+    breaker = get_circuit_breakers()["api"]
+    
+    try:
+        status_code, configuration = conditional_get(
+            breaker, url,
+            decode=lambda data: data.get('configuration', {})
+        )
+        
+        if status_code == 200:
+            breaker.remember(("config", device_id), configuration)
+            return (True, configuration, "Configuration retrieved successfully")
+        elif status_code == 404:
+            return (False, {}, f"Device '{device_id}' not found.")
+        else:
+            result = (False, {}, f"Unexpected error: Status code {status_code}")
+    
+    except requests.exceptions.RequestException as e:
+        result = (False, {}, f"Network error: {str(e)}")
+    except Exception as e:
+        return (False, {}, f"Error fetching configuration: {str(e)}")
+    
+    # Serve the last known configuration while the API is failing
+    snapshot = breaker.last_snapshot(("config", device_id))
+    if snapshot and breaker.degraded:
+        return (True, snapshot[0], "Showing last known configuration")
+    return result
+
+def update_device_config(device_id, configuration, session=None):
+    """
+    Update device configuration via the API
+    Returns tuple: (success: bool, message: str, status_code: int)
+    """
+    endpoint = os.environ.get('API_ENDPOINT', 'http://127.0.0.1:8000/')
+    url = f"{endpoint}/api/v1/devices/{device_id}"
+    
+    try:
+        payload = {
+            "device_id": device_id,
+            "configuration": configuration
+        }
+        
+        response = guarded_request(get_circuit_breakers()["api"], "PATCH", url, session=session, json=payload, timeout=10)
+        
+        if response.status_code == 200:
+            return (True, f"Device '{device_id}' updated successfully!", 200)
+        elif response.status_code == 404:
+            return (False, f"Device '{device_id}' not found.", 404)
+        elif response.status_code == 400:
+            return (False, "Invalid request format. Please check your inputs.", 400)
+        else:
+            return (False, f"Unexpected error: Status code {response.status_code}", response.status_code)
+    
+    except requests.exceptions.RequestException as e:
+        return (False, f"Network error: {str(e)}", 0)
+    except Exception as e:
+        return (False, f"Error updating device: {str(e)}", 0)
+
+def delete_device(device_id):
+    """
+    Delete a device via the API
+    Returns tuple: (success: bool, message: str, status_code: int)
+    """
+    endpoint = os.environ.get('API_ENDPOINT', 'http://127.0.0.1:8000/')
+    url = f"{endpoint}/api/v1/devices/{device_id}"
+    
+    try:
+        response = guarded_request(get_circuit_breakers()["api"], "DELETE", url, timeout=10)
+        
+        if response.status_code == 204:
+            return (True, f"Device '{device_id}' deleted successfully!", 204)
+        elif response.status_code == 404:
+            return (False, f"Device '{device_id}' not found.", 404)
+        else:
+            return (False, f"Unexpected error: Status code {response.status_code}", response.status_code)
+    
+    except requests.exceptions.RequestException as e:
+        return (False, f"Network error: {str(e)}", 0)
+    except Exception as e:
+        return (False, f"Error deleting device: {str(e)}", 0)
+
+@cached(ttl=30)  # Cache for 30 seconds
+def fetch_telemetry_data(device_id, start_time=None, end_time=None):
+    """
+    Fetch telemetry data for a device within a time range
+    
+    Args:
+        device_id: Device identifier
+        start_time: datetime object for range start (optional)
+        end_time: datetime object for range end (optional)
+    
+    Returns:
+        tuple: (success: bool, data: DataFrame, message: str)
+        data is columnar (see telemetry_frame) with UTC timestamps
+    
+    Ranges wider than TELEMETRY_SLICE are fetched as concurrent slices and stitched in order
+    Narrower ranges fall back to the device's last fetched records while the API is failing
+    Cached for 30 seconds to reduce API calls
+    """
+    if not (start_time and end_time) or end_time - start_time <= TELEMETRY_SLICE:
+        # Only the open-ended URL is requested again unchanged, so only it is worth revalidating
+        success, data, message = request_telemetry(device_id, start_time, end_time, remember=not (start_time or end_time))
+        breaker = get_circuit_breakers()["api"]
+        if success:
+            breaker.remember(("telemetry", device_id), data)
+            return (success, data, message)
+        
+        # Serve the last known records in this window while the API is failing
+        snapshot = breaker.last_snapshot(("telemetry", device_id))
+        if snapshot is None or not breaker.degraded:
+            return (success, data, message)
+        data = snapshot[0]
+        if not data.empty:
+            in_window = pd.Series(True, index=data.index)
+            if start_time:
+                in_window &= data['timestamp'] >= to_utc(start_time)
+            if end_time:
+                in_window &= data['timestamp'] <= to_utc(end_time)
+            data = data[in_window].reset_index(drop=True)
+        return (True, data, "Showing last known data")
+    
+    frames = []
+    for slice_start, slice_end, success, data, message in iter_telemetry_slices(device_id, start_time, end_time):
+        if not success:
+            return (False, pd.DataFrame(), message)
+        if not data.empty:
+            frames.append(data)
+    
+    data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return (True, data, "Data retrieved successfully")
+
+def request_telemetry(device_id, start_time=None, end_time=None, remember=True):
+    """
+    Uncached telemetry request behind fetch_telemetry_data
+    Same arguments and return value as fetch_telemetry_data
+    remember=False skips the conditional request cache (see conditional_get)
+    """
+    endpoint = os.environ.get('API_ENDPOINT', 'http://127.0.0.1:8000/')
+    url = f"{endpoint}/api/v1/telemetry/{device_id}"
+    
+    # Build query parameters
+    params = {}
+    if start_time:
+        params['start_time'] = start_time.strftime("%Y-%m-%dT%H:%M:%S")
+    if end_time:
+        params['end_time'] = end_time.strftime("%Y-%m-%dT%H:%M:%S")
+    
+    try:
+        # Binary formats are requested when their decoder is installed
+        status_code, data = conditional_get(
+            get_circuit_breakers()["api"], url, params=params,
+            decode=telemetry_frame, accept=telemetry_accept_header(), remember=remember
+        )
+        
+        if status_code == 200:
+            return (True, data, "Data retrieved successfully")
+        elif status_code == 404:
+            return (False, pd.DataFrame(), f"Device '{device_id}' not found")
+        else:
+            return (False, pd.DataFrame(), f"Error: Status code {status_code}")
+    
+    except requests.exceptions.RequestException as e:
+        return (False, pd.DataFrame(), f"Network error: {str(e)}")
+    except Exception as e:
+        return (False, pd.DataFrame(), f"Error: {str(e)}")
+
+# Device page windows end on this grid (seconds, the fetch_telemetry_data TTL),
+# so every viewer of a device within one step shares a cache key
+TELEMETRY_WINDOW_ALIGN = 30
+
+# Wide telemetry ranges are split into slices of this size on a fixed grid
+TELEMETRY_SLICE = timedelta(hours=6)
+# Slices of one range fetched at once
+TELEMETRY_SLICE_WORKERS = 4
+
+def telemetry_slices(start_time, end_time, slice_size=TELEMETRY_SLICE):
+    """
+    Split [start_time, end_time] (naive local datetimes) into consecutive slices
+    Slice bounds fall on a fixed `slice_size` grid, so inner slices are the same across calls
+    Returns a list of (slice_start, slice_end) tuples, oldest first
+    """
+    bounds = []
+    slice_start = start_time
+    while slice_start < end_time:
+        slice_end = min(end_time, (pd.Timestamp(slice_start).floor(slice_size) + slice_size).to_pydatetime())
+        bounds.append((slice_start, slice_end))
+        slice_start = slice_end
+    return bounds
+
+def request_telemetry_slice(device_id, slice_start, slice_end, range_end):
+    """
+    Telemetry request for one slice of a range ending at `range_end`
+    Slices are not kept in the conditional request cache, so a wide range never
+    sits in memory all at once. Each slice keeps only records before its end,
+    so a record on a shared bound is counted once by the next slice whether or
+    not the API includes the end time.
+    Returns tuple: (success: bool, data: DataFrame, message: str)
+    """
+    success, data, message = request_telemetry(device_id, slice_start, slice_end, remember=False)
+    if success and not data.empty and slice_end < range_end:
+        data = data[data['timestamp'] < to_utc(slice_end)]
+    return (success, data, message)
+
+def iter_telemetry_slices(device_id, start_time, end_time, newest_first=False):
+    """
+    Fetch a wide telemetry range as concurrent slices and yield them in order
+    Slices are decoded by the worker that fetched them. At most
+    TELEMETRY_SLICE_WORKERS slices are in flight or waiting to be yielded,
+    so memory is bounded by the slice size rather than the range size.
+    
+    Yields:
+        tuple: (slice_start, slice_end, success: bool, data: DataFrame, message: str)
+    """
+    bounds = telemetry_slices(start_time, end_time)
+    if newest_first:
+        bounds.reverse()
+    
+    executor = ThreadPoolExecutor(max_workers=TELEMETRY_SLICE_WORKERS)
+    fetch_slice = attach_script_run_ctx(request_telemetry_slice)
+    pending = deque()
+    try:
+        for slice_start, slice_end in bounds:
+            pending.append((slice_start, slice_end, executor.submit(
+                fetch_slice, device_id, slice_start, slice_end, end_time
+            )))
+            if len(pending) == TELEMETRY_SLICE_WORKERS:
+                slice_start, slice_end, future = pending.popleft()
+                yield (slice_start, slice_end, *future.result())
+        while pending:
+            slice_start, slice_end, future = pending.popleft()
+            yield (slice_start, slice_end, *future.result())
+    finally:
+        # Stop fetching if the caller stops early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def process_telemetry_data(telemetry):
+    """
+    Process telemetry into a DataFrame with local timestamps
+    Accepts the columnar frame returned by request_telemetry (or raw records)
+    
+    Returns:
+        DataFrame with columns: timestamp, metric1, metric2, ...
+    """
+    if not isinstance(telemetry, pd.DataFrame):
+        telemetry = telemetry_frame(telemetry)
+    if telemetry.empty:
+        return pd.DataFrame()
+    
+    # Convert UTC timestamps to local time
+    df = telemetry.copy()
+    df['timestamp'] = df['timestamp'].dt.tz_convert(datetime.now().astimezone().tzinfo)
+    
+    # Sort by timestamp
+    return df.sort_values('timestamp')
+
+# Seconds between polls while the device page is in live mode
+LIVE_TAIL_INTERVAL = 5
+
+def fetch_new_telemetry(device_id, since):
+    """
+    Fetch and process only the telemetry recorded after `since`
+    Used by the device page live mode, so it is not cached
+    
+    Args:
+        device_id: Device identifier
+        since: timezone-aware timestamp of the newest record already shown
+    
+    Returns:
+        DataFrame like process_telemetry_data, empty if nothing is new or on error
+    """
+    success, telemetry, message = request_telemetry(device_id, to_api_time(since), remember=False)
+    
+    if not success:
+        print(f"Error polling telemetry for {device_id}: {message}")
+        return pd.DataFrame()
+    
+    new_df = process_telemetry_data(telemetry)
+    get_telemetry_stats().ingest(device_id, new_df)
+    
+    # start_time has second resolution, so drop records that are already shown
+    if not new_df.empty:
+        new_df = new_df[new_df['timestamp'] > since]
+    
+    return new_df
+
+# Rollup bucket sizes, finest first
+ROLLUP_RESOLUTIONS = {
+    "1 minute": timedelta(minutes=1),
+    "15 minutes": timedelta(minutes=15),
+    "1 hour": timedelta(hours=1),
+}
+# A rollup is only used if it still gives the chart at least this many buckets
+ROLLUP_CHART_POINTS = 200
+# How long each resolution's buckets are kept: a resolution is only charted while
+# the next coarser one gives fewer than ROLLUP_CHART_POINTS buckets, and the
+# coarsest covers the longest selectable time range
+ROLLUP_RETENTION = {
+    "1 minute": ROLLUP_CHART_POINTS * timedelta(minutes=15),  # 50 hours
+    "15 minutes": ROLLUP_CHART_POINTS * timedelta(hours=1),  # about 8 days
+    "1 hour": timedelta(days=30),
+}
+# Devices whose rollups have not been viewed or loaded for this long are dropped
+ROLLUP_IDLE_TIMEOUT = timedelta(hours=6)
+
+def to_api_time(ts):
+    """Convert a timestamp to the naive local datetime the telemetry API expects"""
+    return pd.Timestamp(ts).to_pydatetime().astimezone().replace(tzinfo=None)
+
+def to_utc(ts):
+    """Convert a timestamp to a UTC Timestamp; naive values are taken as local time"""
+    return pd.Timestamp(pd.Timestamp(ts).to_pydatetime().astimezone()).tz_convert("UTC")
+
+def choose_rollup_resolution(time_delta):
+    """
+    Pick the coarsest rollup resolution that still fills a chart of `time_delta`
+    Returns a ROLLUP_RESOLUTIONS key, or None if the range needs raw data
+    """
+    for name, bucket in reversed(ROLLUP_RESOLUTIONS.items()):
+        if time_delta / bucket >= ROLLUP_CHART_POINTS:
+            return name
+    return None
+
+def merge_rollup_buckets(existing, new):
+    """Combine two bucket frames, merging the stats of buckets present in both"""
+    if existing is None or existing.empty:
+        return new
+    
+    overlap = existing.index.intersection(new.index)
+    if overlap.empty:
+        return pd.concat([existing, new]).sort_index()
+    
+    both = pd.concat([existing.loc[overlap], new.loc[overlap]])
+    merge_funcs = {col: ("min" if col[1] == "min" else "max" if col[1] == "max" else "sum") for col in both.columns}
+    merged = both.groupby(level=0).agg(merge_funcs)
+    return pd.concat([existing.drop(overlap), new.drop(overlap), merged]).sort_index()
+
+class TelemetryRollups:
+    """
+    Per-device telemetry rollups, maintained incrementally as records arrive
+    Every metric keeps sum, count, min and max per bucket for each of
+    ROLLUP_RESOLUTIONS, so means can be derived and buckets merged later.
+    Each device also tracks the span it covers, so only uncovered ranges are fetched.
+    Buckets are kept for ROLLUP_RETENTION per resolution, and devices nobody has
+    viewed for ROLLUP_IDLE_TIMEOUT are dropped whenever a range is requested.
+    Bucket memory is charged to the shared DataCache budget; beyond `max_bytes`
+    the least recently viewed devices are dropped.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.devices = {}
+        self._lock = threading.Lock()
+
+    def missing_ranges(self, device_id, start_time, end_time):
+        """
+        Return the (start, end, newest_first) ranges that still have to be fetched for this window
+        A range fetched in parts must be ingested in the given order so the
+        covered span grows without holes: newest first before the covered span,
+        oldest first after it
+        """
+        start, end = to_utc(start_time), to_utc(end_time)
+        with self._lock:
+            self._evict()
+            state = self.devices.get(device_id)
+            if state is None:
+                return [(start, end, True)]
+            
+            gaps = []
+            if start < state["covered_from"]:
+                gaps.append((start, state["covered_from"], True))
+            # Always look for records newer than the latest one ingested
+            gaps.append((state["covered_until"], end, False))
+            return gaps
+
+    def ingest(self, device_id, df, fetched_from, fetched_until):
+        """
+        Add processed telemetry (as returned by process_telemetry_data) that was
+        fetched for [fetched_from, fetched_until]
+        Records inside the already covered span are skipped, so nothing is counted twice.
+        """
+        fetched_from = to_utc(fetched_from)
+        now = to_utc(datetime.now())
+        
+        if df.empty or 'timestamp' not in df.columns:
+            numeric = pd.DataFrame()
+        else:
+            numeric = df.set_index(pd.DatetimeIndex(df['timestamp']).tz_convert("UTC"))
+            numeric = numeric.drop(columns=['timestamp']).select_dtypes("number")
+        
+        with self._lock:
+            state = self.devices.get(device_id)
+            if state is None:
+                state = {"buckets": {}, "covered_from": fetched_from, "covered_until": fetched_from, "last_seen": None, "bytes": 0}
+                self.devices[device_id] = state
+            elif not numeric.empty:
+                new_records = (numeric.index < state["covered_from"]) | (numeric.index > state["covered_until"])
+                numeric = numeric[new_records]
+            state["viewed_at"] = time.monotonic()
+            
+            if not numeric.empty:
+                for name, bucket in ROLLUP_RESOLUTIONS.items():
+                    new_buckets = numeric.groupby(numeric.index.floor(bucket)).agg(["sum", "count", "min", "max"])
+                    buckets = merge_rollup_buckets(state["buckets"].get(name), new_buckets)
+                    state["buckets"][name] = buckets[buckets.index >= (now - ROLLUP_RETENTION[name]).floor(bucket)]
+                
+                newest = numeric.index.max()
+                state["covered_until"] = max(state["covered_until"], newest)
+                state["last_seen"] = newest if state["last_seen"] is None else max(state["last_seen"], newest)
+                state["bytes"] = sum(estimate_size(buckets) for buckets in state["buckets"].values())
+                self._evict(keep=device_id)
+            
+            state["covered_from"] = max(min(state["covered_from"], fetched_from), now - max(ROLLUP_RETENTION.values()))
+
+    def view(self, device_id, resolution, start_time, end_time):
+        """
+        Return the buckets of one resolution within a time window
+        Columns are (metric, stat) pairs with stat in mean/min/max/count, indexed by
+        local bucket start time
+        """
+        with self._lock:
+            state = self.devices.get(device_id)
+            if state:
+                state["viewed_at"] = time.monotonic()
+            buckets = state["buckets"].get(resolution) if state else None
+        
+        if buckets is None or buckets.empty:
+            return pd.DataFrame()
+        
+        window = buckets[(buckets.index >= to_utc(start_time).floor(ROLLUP_RESOLUTIONS[resolution]))
+                         & (buckets.index <= to_utc(end_time))]
+        counts = window.xs("count", axis=1, level=1)
+        stats = pd.concat({
+            "mean": window.xs("sum", axis=1, level=1) / counts.where(counts > 0),
+            "min": window.xs("min", axis=1, level=1),
+            "max": window.xs("max", axis=1, level=1),
+            "count": counts,
+        }, axis=1).swaplevel(axis=1).sort_index(axis=1)
+        stats.index = stats.index.tz_convert(datetime.now().astimezone().tzinfo)
+        stats.index.name = "timestamp"
+        return stats
+
+    def last_seen(self, device_id):
+        """Local timestamp of the newest record ingested for a device, or None"""
+        with self._lock:
+            state = self.devices.get(device_id)
+            last_seen = state["last_seen"] if state else None
+        
+        if last_seen is None:
+            return None
+        return last_seen.tz_convert(datetime.now().astimezone().tzinfo)
+
+    def _evict(self, keep=None):
+        """
+        Drop devices not viewed for ROLLUP_IDLE_TIMEOUT, then the least recently
+        viewed ones (except `keep`) while over `max_bytes` (caller holds the lock)
+        """
+        cutoff = time.monotonic() - ROLLUP_IDLE_TIMEOUT.total_seconds()
+        for device_id in [device_id for device_id, state in self.devices.items() if state["viewed_at"] < cutoff]:
+            del self.devices[device_id]
+        
+        used = sum(state["bytes"] for state in self.devices.values())
+        for device_id in sorted(self.devices, key=lambda device_id: self.devices[device_id]["viewed_at"]):
+            if not self.max_bytes or used <= self.max_bytes:
+                break
+            if device_id != keep:
+                used -= self.devices.pop(device_id)["bytes"]
+        get_data_cache().charge("rollups", used)
+
+
+@st.cache_resource(show_spinner=False)
+def get_telemetry_rollups():
+    """Rollup store shared by all sessions"""
+    return TelemetryRollups(max_bytes=store_budget("rollups"))
+
+def load_telemetry_rollup(device_id, start_time, end_time, resolution, on_progress=None):
+    """
+    Serve a time range from the rollup store at the given resolution
+    Only the ranges the store does not cover yet are fetched and ingested,
+    so repeat views of a long range cost one small request for new records
+    Uncovered ranges are fetched as concurrent slices and each slice is ingested
+    as it arrives; `on_progress(view, fraction)` is called after every slice so
+    callers can show the partial result
+    
+    Returns:
+        tuple: (success: bool, data: DataFrame from TelemetryRollups.view, message: str)
+    """
+    rollups = get_telemetry_rollups()
+    gaps = rollups.missing_ranges(device_id, start_time, end_time)
+    total = sum((gap_end - gap_start for gap_start, gap_end, newest_first in gaps), pd.Timedelta(0))
+    loaded = pd.Timedelta(0)
+    stats = get_telemetry_stats()
+    
+    for gap_start, gap_end, newest_first in gaps:
+        # Rolling stats take records in time order. Oldest-first slices go
+        # straight in; newest-first ones are held only until they fill the
+        # stats window, then handed over oldest first when the gap is done.
+        newest = []
+        slices = iter_telemetry_slices(device_id, to_api_time(gap_start), to_api_time(gap_end), newest_first)
+        for slice_start, slice_end, success, telemetry, message in slices:
+            if not success:
+                slices.close()
+                if newest:
+                    stats.ingest(device_id, pd.concat(newest[::-1], ignore_index=True))
+                # Keep serving what is already rolled up if the API is failing
+                if rollups.last_seen(device_id) is None:
+                    return (False, pd.DataFrame(), message)
+                print(f"Error updating rollups for {device_id}: {message}")
+                return (True, rollups.view(device_id, resolution, start_time, end_time), "Data retrieved successfully")
+            rollups.ingest(device_id, process_telemetry_data(telemetry), slice_start, slice_end)
+            if not newest_first:
+                stats.ingest(device_id, telemetry)
+            elif not telemetry.empty and sum(len(frame) for frame in newest) < stats.window:
+                newest.append(telemetry)
+            
+            loaded += to_utc(slice_end) - to_utc(slice_start)
+            if on_progress and loaded < total:
+                on_progress(rollups.view(device_id, resolution, start_time, end_time), loaded / total)
+        
+        if newest:
+            stats.ingest(device_id, pd.concat(newest[::-1], ignore_index=True))
+    
+    return (True, rollups.view(device_id, resolution, start_time, end_time), "Data retrieved successfully")
+
+# ============================================================================
+# ROLLING STATISTICS
+# ============================================================================
+
+# Records per device and metric that the rolling statistics cover
+ANOMALY_WINDOW = 288  # a day at 5 minute reporting
+# Records needed in the window before anything is flagged
+ANOMALY_MIN_POINTS = 30
+# A value this many standard deviations from the rolling mean is a spike
+ANOMALY_Z_SCORE = 4
+# The same value this many records in a row, after a different value, is a
+# stuck sensor
+ANOMALY_STUCK_POINTS = 30
+# Metrics that may legitimately stay flat (e.g. "rain,humidity") are never stuck
+ANOMALY_STUCK_EXEMPT = {metric.strip() for metric in os.environ.get('ANOMALY_STUCK_EXEMPT', '').split(',') if metric.strip()}
+# Anomalies kept per device, and how recent one must be to flag the device list
+ANOMALY_HISTORY = 200
+ANOMALY_RECENT = timedelta(hours=1)
+
+class RollingStats:
+    """
+    Mean, variance, min and max over the last `window` values of one metric
+    add() is O(1) per value (amortized for min/max): the mean and variance are
+    updated with Welford's method and the value leaving the window is removed
+    the same way in reverse; min and max come from monotonic deques. Removal
+    leaves rounding residue, so a window that has gone flat is reset exactly.
+    A metric only counts as stuck if its current run began after a different
+    value, so one that has always been flat is not flagged; it then stays stuck
+    until the value changes, however long the run.
+    """
+
+    def __init__(self, window=ANOMALY_WINDOW, detect_stuck=True):
+        self.window = window
+        self.detect_stuck = detect_stuck
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.added = 0
+        self.mins = deque()  # (position, value), values increasing
+        self.maxes = deque()  # (position, value), values decreasing
+        self.last = None
+        self.run_length = 0
+        self.run_after_change = False
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    @property
+    def std(self):
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+
+    @property
+    def stuck(self):
+        return self.detect_stuck and self.run_after_change and self.run_length >= ANOMALY_STUCK_POINTS
+
+    @property
+    def min(self):
+        return self.mins[0][1] if self.mins else None
+
+    @property
+    def max(self):
+        return self.maxes[0][1] if self.maxes else None
+
+    def add(self, value):
+        """Add one value, dropping the oldest once the window is full"""
+        if len(self.values) == self.window:
+            old = self.values.popleft()
+            n = len(self.values)
+            if n:
+                delta = old - self.mean
+                self.mean -= delta / n
+                self.m2 = max(self.m2 - delta * (old - self.mean), 0.0)
+            else:
+                self.mean = self.m2 = 0.0
+        
+        self.values.append(value)
+        delta = value - self.mean
+        self.mean += delta / len(self.values)
+        self.m2 += delta * (value - self.mean)
+        
+        position = self.added
+        self.added += 1
+        while self.mins and self.mins[-1][1] >= value:
+            self.mins.pop()
+        self.mins.append((position, value))
+        while self.maxes and self.maxes[-1][1] <= value:
+            self.maxes.pop()
+        self.maxes.append((position, value))
+        oldest = self.added - self.window
+        while self.mins[0][0] < oldest:
+            self.mins.popleft()
+        while self.maxes[0][0] < oldest:
+            self.maxes.popleft()
+        if self.mins[0][1] == self.maxes[0][1]:
+            self.mean, self.m2 = float(value), 0.0
+        
+        if value == self.last:
+            self.run_length += 1
+        else:
+            self.run_after_change = self.last is not None
+            self.run_length = 1
+        self.last = value
+
+    def check(self, value):
+        """Return "spike" or "stuck" if `value` would be anomalous against the current window, else None"""
+        if self.count < ANOMALY_MIN_POINTS:
+            return None
+        if (self.detect_stuck and self.run_after_change and value == self.last
+                and self.run_length + 1 == ANOMALY_STUCK_POINTS):
+            return "stuck"
+        std = self.std
+        # Anything below float noise around the mean is a flat window
+        if std > 1e-9 * max(1.0, abs(self.mean)) and abs(value - self.mean) > ANOMALY_Z_SCORE * std:
+            return "spike"
+        return None
+
+
+class TelemetryStats:
+    """
+    Online per-device, per-metric RollingStats with anomaly flags
+    Records are taken once, in time order: anything not newer than the latest
+    record already seen for a device is skipped, so the same data can be offered
+    from the device list, the device page and live mode without double counting.
+    The one exception is a device whose windows are not full yet: a frame
+    reaching further back (e.g. a device page range after the device list's
+    short history) replaces its state, since it gives a better baseline.
+    """
+
+    def __init__(self, window=ANOMALY_WINDOW):
+        self.window = window
+        self.devices = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, device_id, df):
+        """Add telemetry (a frame with a timestamp column and metric columns) and flag anomalies"""
+        if df is None or df.empty or 'timestamp' not in df.columns:
+            return
+        
+        times = pd.DatetimeIndex(df['timestamp']).tz_convert("UTC").as_unit("ns").asi8
+        numeric = df.drop(columns=['timestamp']).select_dtypes("number")
+        with self._lock:
+            state = self.devices.get(device_id)
+            shallow = state is None or any(stats.count < self.window for stats in state["metrics"].values())
+            if shallow and (state is None or times.min() < state["first_seen"]):
+                state = {"first_seen": times.min(), "last_seen": None, "metrics": {},
+                         "anomalies": deque(maxlen=ANOMALY_HISTORY)}
+                self.devices[device_id] = state
+            
+            new = times > state["last_seen"] if state["last_seen"] is not None else np.ones(len(times), dtype=bool)
+            if not new.any():
+                return
+            order = np.argsort(times[new], kind="stable")
+            new_times = times[new][order]
+            
+            for metric in numeric.columns:
+                stats = state["metrics"].get(metric)
+                if stats is None:
+                    stats = state["metrics"][metric] = RollingStats(self.window, metric not in ANOMALY_STUCK_EXEMPT)
+                values = numeric[metric].to_numpy(dtype=float)[new][order]
+                for timestamp, value in zip(new_times.tolist(), values.tolist()):
+                    if value != value:  # NaN, the metric was not in this record
+                        continue
+                    kind = stats.check(value)
+                    if kind:
+                        state["anomalies"].append((timestamp, metric, value, kind))
+                    stats.add(value)
+            state["last_seen"] = int(new_times[-1])
+
+    def summary(self, device_id):
+        """Current rolling stats per metric: {metric: {count, mean, std, min, max}}"""
+        with self._lock:
+            state = self.devices.get(device_id)
+            if state is None:
+                return {}
+            return {
+                metric: {"count": stats.count, "mean": float(stats.mean), "std": float(stats.std), "min": stats.min, "max": stats.max}
+                for metric, stats in state["metrics"].items()
+            }
+
+    def anomalies(self, device_id, since=None):
+        """
+        Anomalies flagged for a device, oldest first, optionally only those after `since`
+        Returns a DataFrame with local timestamp, metric, value and kind columns
+        """
+        with self._lock:
+            state = self.devices.get(device_id)
+            rows = list(state["anomalies"]) if state else []
+        
+        df = pd.DataFrame(rows, columns=["timestamp", "metric", "value", "kind"])
+        df["timestamp"] = pd.to_datetime(df["timestamp"].astype("int64"), utc=True).dt.tz_convert(
+            datetime.now().astimezone().tzinfo
+        )
+        if since is not None:
+            df = df[df["timestamp"] > to_utc(since)]
+        return df
+
+    def recent_anomalies(self, device_id, within=ANOMALY_RECENT):
+        """
+        Short descriptions of a device's current problems, e.g. ["spike in temperature"]
+        Covers anomalies flagged in the last `within` and metrics that are still stuck
+        """
+        recent = self.anomalies(device_id, since=pd.Timestamp.now(tz="UTC") - within)
+        problems = list(zip(recent["kind"], recent["metric"]))
+        with self._lock:
+            state = self.devices.get(device_id)
+            if state:
+                problems += [("stuck", metric) for metric, stats in state["metrics"].items() if stats.stuck]
+        return [f"{kind} in {metric}" for kind, metric in dict.fromkeys(problems)]
+
+
+@st.cache_resource(show_spinner=False)
+def get_telemetry_stats():
+    """Rolling statistics shared by all sessions"""
+    return TelemetryStats()
+
+# Fleet analytics time ranges and the bucket size used for each
+FLEET_RANGES = {
+    "Last 6 Hours": (timedelta(hours=6), timedelta(minutes=5)),
+    "Last 24 Hours": (timedelta(hours=24), timedelta(minutes=15)),
+    "Last 7 Days": (timedelta(days=7), timedelta(hours=1)),
+}
+FLEET_FETCH_WORKERS = 10
+
+def fleet_rollup_resolution(bucket):
+    """Coarsest ROLLUP_RESOLUTIONS key whose buckets fit a whole number of times into `bucket`"""
+    for name, size in reversed(ROLLUP_RESOLUTIONS.items()):
+        if bucket % size == timedelta(0):
+            return name
+    raise ValueError(f"Fleet bucket {bucket} is not a multiple of any rollup resolution")
+
+@cached(ttl=60)  # Cache for 60 seconds
+def fetch_fleet_matrix(start_time, end_time, bucket):
+    """
+    Align every device's telemetry into devices x time-bucket matrices
+    Built from the per-device rollups (load_telemetry_rollup), so each device's
+    range is fetched once and later refreshes only fetch records newer than the
+    last ones ingested. Rollup buckets are merged into the fleet buckets with
+    running NumPy sums as each device arrives; bucketing covers the whole fleet
+    matrix rather than looping per device
+    
+    Args:
+        start_time: datetime for the first bucket start (naive local time)
+        end_time: datetime for the end of the last bucket (naive local time)
+        bucket: timedelta bucket size, a multiple of one of ROLLUP_RESOLUTIONS
+    
+    Returns:
+        dict with keys:
+            device_ids: list of device IDs (matrix rows)
+            buckets: DatetimeIndex of local bucket start times (matrix columns)
+            metrics: {metric name: float ndarray of bucket means, NaN where no data}
+            failed: number of devices with telemetry that could not be fetched
+    
+    Cached for 60 seconds, so the newest bucket fills in as records arrive
+    """
+    device_ids = [device_id for device_id, configuration in (fetch_device_records() or [])]
+    n_buckets = int((end_time - start_time) / bucket)
+    bucket_starts = pd.date_range(to_utc(start_time), periods=n_buckets, freq=bucket).tz_convert(
+        datetime.now().astimezone().tzinfo
+    )
+    resolution = fleet_rollup_resolution(bucket)
+    
+    # Step 1: Bring every device's rollup up to date, a bounded number at a time
+    start_ns = to_utc(start_time).value
+    bucket_ns = pd.Timedelta(bucket).value
+    size = len(device_ids) * n_buckets
+    sums, counts = {}, {}
+    failed_rows = set()
+    load = attach_script_run_ctx(load_telemetry_rollup)
+    with ThreadPoolExecutor(max_workers=FLEET_FETCH_WORKERS) as executor:
+        futures = {executor.submit(load, device_id, start_time, end_time, resolution): row
+                   for row, device_id in enumerate(device_ids)}
+        
+        # Step 2: Merge each device's rollup buckets into running per-metric sums and counts
+        for future in as_completed(futures):
+            row = futures[future]
+            success, view, message = future.result()
+            if not success:
+                failed_rows.add(row)
+                continue
+            if view.empty:
+                continue
+            
+            bucket_index = (view.index.as_unit("ns").asi8 - start_ns) // bucket_ns
+            in_range = (bucket_index >= 0) & (bucket_index < n_buckets)
+            means = view.xs("mean", axis=1, level=1)
+            weights = view.xs("count", axis=1, level=1)
+            for metric in means.columns:
+                values = means[metric].to_numpy(dtype=float, na_value=np.nan)
+                n = weights[metric].to_numpy(dtype=float, na_value=0)
+                selected = in_range & (n > 0) & ~np.isnan(values)
+                if not selected.any():
+                    continue
+                cells = row * n_buckets + bucket_index[selected]
+                if metric not in sums:
+                    sums[metric], counts[metric] = np.zeros(size), np.zeros(size)
+                sums[metric] += np.bincount(cells, weights=values[selected] * n[selected], minlength=size)
+                counts[metric] += np.bincount(cells, weights=n[selected], minlength=size)
+    
+    # Step 3: Turn the fleet-wide sums into bucket means
+    matrices = {}
+    for metric in sums:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            matrices[str(metric)] = (sums[metric] / counts[metric]).reshape(len(device_ids), n_buckets)
+    failed = len(failed_rows)
+    
+    return {
+        "device_ids": device_ids,
+        "buckets": bucket_starts,
+        "metrics": matrices,
+        "failed": failed,
+    }
+
+def rank_fleet_outliers(device_ids, matrix):
+    """
+    Rank devices by how far their mean sits from the rest of the fleet
+    Uses a robust z-score (median and median absolute deviation) so a few bad
+    devices do not mask each other
+    
+    Returns:
+        DataFrame with DEVICE_ID, MEAN, Z_SCORE, COVERAGE columns, most unusual first
+    """
+    has_data = ~np.isnan(matrix)
+    counts = has_data.sum(axis=1)
+    sums = np.where(has_data, matrix, 0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        device_means = sums / counts
+    
+    reporting = ~np.isnan(device_means)
+    z_scores = np.full(len(device_ids), np.nan)
+    if reporting.any():
+        median = np.median(device_means[reporting])
+        mad = np.median(np.abs(device_means[reporting] - median))
+        # 0.6745 makes the MAD comparable to a standard deviation
+        z_scores[reporting] = 0.6745 * (device_means[reporting] - median) / (mad if mad > 0 else 1)
+    
+    ranking = pd.DataFrame({
+        "DEVICE_ID": device_ids,
+        "MEAN": device_means,
+        "Z_SCORE": z_scores,
+        "COVERAGE": counts / matrix.shape[1] * 100 if matrix.shape[1] else 0,
+    })
+    # Devices without data sort last
+    order = np.argsort(-np.where(reporting, np.abs(z_scores), -np.inf), kind="stable")
+    return ranking.iloc[order].reset_index(drop=True)
+
+def fleet_heatmap_image(matrix, min_height=300, cell_width=6):
+    """
+    Render a devices x buckets matrix as an RGB image array
+    Drawn directly with NumPy so thousands of devices stay cheap to display
+    Empty cells are grey; colours are scaled between the 2nd and 98th percentile
+    """
+    filled = matrix[~np.isnan(matrix)]
+    if filled.size:
+        low, high = np.percentile(filled, [2, 98])
+    else:
+        low, high = 0, 1
+    
+    with np.errstate(invalid="ignore"):
+        scaled = np.clip((matrix - low) / ((high - low) or 1), 0, 1)
+    
+    low_colour = np.array([235, 242, 255])
+    high_colour = np.array([21, 87, 176])
+    image = low_colour + np.nan_to_num(scaled)[..., None] * (high_colour - low_colour)
+    image[np.isnan(matrix)] = [220, 220, 220]
+    
+    # Repeat rows and columns so small fleets are still readable
+    row_scale = max(1, min_height // max(1, matrix.shape[0]))
+    image = np.repeat(np.repeat(image, row_scale, axis=0), cell_width, axis=1)
+    return image.astype(np.uint8)
+
+def convert_df_to_csv(df):
+    """Convert DataFrame to CSV for download"""
+    return df.to_csv(index=False).encode('utf-8')
+
+def recent_telemetry_frame(telemetry):
+    """
+    telemetry_frame for only the newest ANOMALY_WINDOW records
+    The API lists records newest first, so the rest of the history is never
+    decoded, kept in ConditionalCache or run through the rolling statistics
+    """
+    if isinstance(telemetry, list):
+        return telemetry_frame(telemetry[:ANOMALY_WINDOW])
+    return telemetry_frame(telemetry.slice(0, ANOMALY_WINDOW))
+
+def fetch_device_details(endpoint, breaker, device_id, configuration=None):
+    """
+    Fetch configuration and telemetry for a single device
+    The configuration lookup is skipped when the device list already provided it
+    Rows carry LAST_SEEN and ACTIVE_THRESHOLD; with_fleet_status adds STATUS
+    Safe to call from worker threads (makes no Streamlit calls)
+    """
+    device_info = {
+        "DEVICE_ID": device_id,
+        "LOCATION": "Unknown",
+        "LAST_ACTIVE": "--",
+        "LAST_SEEN": None,
+        "ACTIVE_THRESHOLD": DEFAULT_ACTIVE_THRESHOLD.total_seconds(),
+        "ANOMALIES": []
+    }
+    
+    try:
+        if configuration is None:
+            # Fetch device configuration for location
+            config_status, config = conditional_get(
+                breaker,
+                f"{endpoint}/api/v1/devices/{device_id}",
+                decode=lambda data: data.get('configuration', {})
+            )
+            
+            if config_status == 200:
+                configuration = config
+        
+        if configuration:
+            device_info["LOCATION"] = configuration.get('location', 'Unknown')
+            device_info["ACTIVE_THRESHOLD"] = device_health_settings(configuration)["active_threshold"]
+        
+        # Fetch recent telemetry for last_active and status; records newer than
+        # the last refresh also feed the rolling statistics behind anomaly flags
+        telemetry_status, telemetry = conditional_get(
+            breaker,
+            f"{endpoint}/api/v1/telemetry/{device_id}",
+            decode=recent_telemetry_frame,
+            accept=telemetry_accept_header()
+        )
+        
+        if telemetry_status == 200:
+            if not telemetry.empty:
+                last_active = telemetry['timestamp'].max()
+                device_info["LAST_ACTIVE"] = last_active.strftime("%Y-%m-%d %H:%M:%S")
+                # Status is worked out for the whole fleet at once by with_fleet_status
+                device_info["LAST_SEEN"] = last_active
+                
+                stats = get_telemetry_stats()
+                stats.ingest(device_id, telemetry)
+                device_info["ANOMALIES"] = stats.recent_anomalies(device_id)
+            
+            breaker.remember(("device", device_id), device_info)
+    
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching details for device {device_id}: {e}")
+    except Exception as e:
+        print(f"Error processing device {device_id}: {e}")
+    
+    return device_info
+
+@cached(ttl=30)  # Cache for 30 seconds
+def fetch_device_records():
+    """
+    Fetch the device list from API without any per-device details
+    Returns a list of (device_id, configuration) tuples, or None on failure
+    configuration is None for entries that do not embed it
+    Cached for 30 seconds to reduce API calls
+    """
+    endpoint = os.environ.get('API_ENDPOINT', 'http://127.0.0.1:8000/')
+    breaker = get_circuit_breakers()["api"]
+    
+    try:
+        # List entries are full device records, so reuse any embedded
+        # configuration instead of requesting /devices/{id} again
+        status_code, records = conditional_get(
+            breaker, f"{endpoint}/api/v1/devices",
+            decode=lambda devices_list: [
+                (d.get('device_id'), d.get('configuration'))
+                for d in devices_list if 'device_id' in d
+            ]
+        )
+        
+        if status_code == 200:
+            breaker.remember("device_records", records)
+            return records
+    
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching device list: {e}")
+    except Exception as e:
+        print(f"Error processing device list: {e}")
+    
+    # Serve the last known device list while the API is failing
+    snapshot = breaker.last_snapshot("device_records")
+    if snapshot and breaker.degraded:
+        return snapshot[0]
+    
+    return None
+
+@cached(ttl=30)  # Cache for 30 seconds
+def fetch_device_list():
+    """
+    Fetch device list from API with complete information
+    Combines data from /devices, /devices/{id}, and /telemetry/{id} endpoints
+    /devices/{id} is only requested for entries without an embedded configuration
+    Returns a DataFrame with DEVICE_ID, LOCATION, LAST_ACTIVE, STATUS columns
+    Blocks until every device is loaded; the Devices page streams rows instead
+    Cached for 30 seconds to reduce API calls
+    """
+    endpoint = os.environ.get('API_ENDPOINT', 'http://127.0.0.1:8000/')
+    breaker = get_circuit_breakers()["api"]
+    
+    # Step 1: Fetch all device IDs
+    device_records = fetch_device_records()
+    
+    if device_records is not None:
+        # Step 2: Fetch details for each device concurrently
+        devices = []
+        fetch_details = attach_script_run_ctx(fetch_device_details)
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            future_to_device = {executor.submit(fetch_details, endpoint, breaker, dev_id, config): dev_id 
+                              for dev_id, config in device_records}
+            
+            for future in as_completed(future_to_device):
+                device_info = future.result()
+                devices.append(device_info)
+        
+        devices_df = pd.DataFrame(with_fleet_status(devices), columns=["DEVICE_ID", "LOCATION", "LAST_ACTIVE", "STATUS"])
+        
+        # If the API went down part way through the fan-out, prefer the last
+        # complete snapshot over a table of "Unknown" rows
+        snapshot = breaker.last_snapshot("device_list")
+        if breaker.state != "closed" and snapshot:
+            return snapshot[0]
+        
+        breaker.remember("device_list", devices_df)
+        return devices_df
+    
+    # Return empty DataFrame on failure
+    return pd.DataFrame(columns=["DEVICE_ID", "LOCATION", "LAST_ACTIVE", "STATUS"])
+
+# Longest a Devices page render waits for device rows before showing them as loading
+DEVICE_TABLE_DEADLINE = 2  # seconds
+
+class DeviceDetailLoader:
+    """
+    Background loader for per-device table rows
+    Futures outlive the script run that submitted them, so a device that misses
+    one render's deadline is picked up by a later rerun instead of being refetched.
+    Completed results are reused for `ttl` seconds, matching fetch_device_list.
+    """
+
+    def __init__(self, max_workers=5, ttl=30):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.ttl = ttl
+        self.futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, endpoint, breaker, device_id, configuration=None):
+        """Return the in-flight or fresh future for `device_id`, starting one if needed"""
+        with self._lock:
+            entry = self.futures.get(device_id)
+            if entry:
+                future, submitted_at = entry
+                if not future.done() or time.monotonic() - submitted_at < self.ttl:
+                    return future
+            
+            # Each task runs with the context of the run that submitted it, never a stale one
+            future = self.executor.submit(attach_script_run_ctx(fetch_device_details), endpoint, breaker, device_id, configuration)
+            self.futures[device_id] = (future, time.monotonic())
+            return future
+
+    def clear(self):
+        """Forget all results so the next submit refetches (in-flight work still finishes)"""
+        with self._lock:
+            self.futures = {}
+
+    def forget(self, device_ids):
+        """Forget the results for some devices only, e.g. after their configuration changed"""
+        with self._lock:
+            for device_id in device_ids:
+                self.futures.pop(device_id, None)
+
+
+@st.cache_resource(show_spinner=False)
+def get_device_detail_loader():
+    """Device row loader shared by all sessions"""
+    return DeviceDetailLoader()
+
+# ============================================================================
+# BULK PROVISIONING
+# ============================================================================
+
+# Defaults for bulk imports; both can be changed on the Devices page
+BULK_IMPORT_WORKERS = 8
+BULK_IMPORT_RATE = 10  # requests per second
+
+def parse_csv_cell(value):
+    """
+    Read a CSV cell as an int, float or bool when it looks like one, otherwise keep the string
+    Codes with leading zeros ("007"), digit separators and words such as "NaN"
+    or "Infinity" stay strings
+    """
+    digits = value.lstrip("+-")
+    if "_" in value or (len(digits) > 1 and digits[0] == "0" and digits[1].isdigit()):
+        return value
+    for convert in (int, float):
+        try:
+            number = convert(value)
+        except ValueError:
+            continue
+        return number if math.isfinite(number) else value
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+def parse_device_import(content, filename):
+    """
+    Parse a bulk device import file
+    CSV files need a device_id column. A configuration column is read as a JSON
+    object, and any other non-empty columns are added to the configuration.
+    JSON files hold a list of {"device_id", "configuration"} objects (or {"devices": [...]}).
+    Returns a list of {"device_id", "configuration"} dicts in file order
+    Raises ValueError if the file cannot be read at all
+    """
+    if filename.lower().endswith(".json"):
+        data = decode_json(content)
+        if isinstance(data, dict):
+            data = data.get("devices")
+        if not isinstance(data, list):
+            raise ValueError("JSON import must be a list of devices")
+        return [
+            {"device_id": item.get("device_id"), "configuration": item.get("configuration", {})}
+            if isinstance(item, dict) else {"device_id": None, "configuration": item}
+            for item in data
+        ]
+    
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    if not reader.fieldnames or "device_id" not in reader.fieldnames:
+        raise ValueError("CSV import needs a device_id column")
+    
+    devices = []
+    for row in reader:
+        configuration = {}
+        raw_config = (row.pop("configuration", None) or "").strip()
+        if raw_config:
+            try:
+                configuration = json.loads(raw_config)
+            except json.JSONDecodeError as e:
+                configuration = f"Invalid JSON: {e}"
+        if isinstance(configuration, dict):
+            for key, value in row.items():
+                if key and key != "device_id" and value not in (None, ""):
+                    configuration[key] = parse_csv_cell(value.strip())
+        devices.append({"device_id": row.get("device_id"), "configuration": configuration})
+    return devices
+
+def validate_device_import(devices, existing_ids=()):
+    """
+    Check parsed import rows before anything is sent
+    Adds an "errors" list to every row; rows with no errors are ready to submit
+    Catches missing or duplicate IDs, IDs that already exist, non-object
+    configurations and out of range coordinates
+    """
+    seen = set()
+    existing_ids = set(existing_ids)
+    for device in devices:
+        errors = []
+        device_id = device["device_id"]
+        if not isinstance(device_id, str) or not device_id.strip():
+            errors.append("Device ID is required")
+        else:
+            device_id = device["device_id"] = device_id.strip()
+            if device_id in seen:
+                errors.append("Duplicate device ID in file")
+            elif device_id in existing_ids:
+                errors.append("Device already exists")
+            seen.add(device_id)
+        
+        configuration = device["configuration"]
+        if isinstance(configuration, str):
+            errors.append(configuration)
+        elif not isinstance(configuration, dict):
+            errors.append("Configuration must be a JSON object")
+        else:
+            for key, limit in (("latitude", 90), ("longitude", 180)):
+                value = configuration.get(key)
+                if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool)
+                                          or not math.isfinite(value) or abs(value) > limit):
+                    errors.append(f"{key.title()} must be a number between -{limit} and {limit}")
+            try:
+                # NaN and Infinity (accepted by json.loads) cannot be sent as JSON
+                json.dumps(configuration, allow_nan=False)
+            except ValueError:
+                errors.append("Configuration must not contain NaN or Infinity")
+        
+        device["errors"] = errors
+    return devices
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 1 / `rate` seconds apart across all threads
+    acquire() blocks until the caller's slot comes up
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+@contextlib.contextmanager
+def write_pool(workers):
+    """
+    Thread pool and a pooled requests.Session sized for it, for batches of API writes
+    Wrap submitted calls with attach_script_run_ctx to give them the caller's
+    script run context. On exit queued requests are cancelled without waiting,
+    so a caller that stops early stops sending.
+    
+    Yields:
+        tuple: (executor, session)
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        yield executor, session
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        session.close()
+
+
+def bulk_create_devices(devices, workers=BULK_IMPORT_WORKERS, rate=BULK_IMPORT_RATE):
+    """
+    Create validated devices concurrently, at most `rate` requests per second
+    Requests share one pooled session. Caches are not touched, so callers
+    refresh the device list once after the whole batch.
+    
+    Yields:
+        tuple: (device_id, success: bool, message: str, status_code: int) as each request finishes
+    """
+    limiter = RateLimiter(rate)
+    with write_pool(workers) as (executor, session):
+        @attach_script_run_ctx
+        def submit(device):
+            limiter.acquire()
+            return create_device(device["device_id"], device["configuration"], session=session)
+        
+        futures = {executor.submit(submit, device): device["device_id"] for device in devices}
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
+
+# ============================================================================
+# CONFIG ROLLOUT
+# ============================================================================
+
+# Defaults for fleet-wide config rollouts; all can be changed on the Devices page
+ROLLOUT_WAVE_SIZE = 10
+ROLLOUT_WORKERS = 5
+
+def merge_patch_diff(current, desired):
+    """
+    Minimal JSON merge-patch (RFC 7386) that turns `current` into `desired`
+    Only changed keys are included, nested objects are diffed key by key and
+    removed keys are set to None. Returns {} when nothing changes.
+    """
+    patch = {}
+    for key in current.keys() - desired.keys():
+        patch[key] = None
+    for key, value in desired.items():
+        old = current.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = merge_patch_diff(old, value)
+            if nested:
+                patch[key] = nested
+        elif key not in current or old != value or type(old) is not type(value):
+            patch[key] = value
+    return patch
+
+def apply_merge_patch(target, patch):
+    """Return a copy of `target` with a JSON merge-patch (RFC 7386) applied"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+def config_matches(configuration, config_filter):
+    """True if every key in `config_filter` has the same value in the configuration"""
+    return all(key in configuration and configuration[key] == value for key, value in config_filter.items())
+
+def plan_config_rollout(device_records, patch, id_pattern="*", config_filter=None):
+    """
+    Work out what a fleet-wide rollout of `patch` would send to each device
+    Devices are selected by an fnmatch-style ID pattern and an optional dict of
+    configuration values that must all match. For each selected device the
+    patch is applied to its cached configuration, and the minimal merge-patch
+    between the two shows what would change.
+    Configurations missing from the device list are fetched through fetch_device_config.
+    
+    Returns:
+        list: {"device_id", "current", "desired", "patch", "error"} dicts; an empty
+        "patch" means the device is already up to date
+    """
+    plan = []
+    for device_id, configuration in device_records:
+        if not fnmatch.fnmatchcase(str(device_id), id_pattern or "*"):
+            continue
+        error = None
+        if configuration is None:
+            success, configuration, message = fetch_device_config(device_id)
+            if not success:
+                configuration, error = {}, message
+        if error is None and config_filter and not config_matches(configuration, config_filter):
+            continue
+        
+        desired = apply_merge_patch(configuration, patch)
+        plan.append({
+            "device_id": device_id,
+            "current": configuration,
+            "desired": desired,
+            "patch": {} if error else merge_patch_diff(configuration, desired),
+            "error": error,
+        })
+    return plan
+
+def store_rollout_config(device_id, configuration):
+    """Write a device's new configuration into the cached config and device list, keeping their expiry"""
+    fetch_device_config.update(
+        lambda result: (True, configuration, result[2]) if result[0] else result, device_id
+    )
+    fetch_device_records.update(
+        lambda records: records and [
+            (dev_id, configuration if dev_id == device_id else config) for dev_id, config in records
+        ]
+    )
+
+def rollout_config(plan, wave_size=ROLLOUT_WAVE_SIZE, workers=ROLLOUT_WORKERS):
+    """
+    Apply a rollout plan in waves of `wave_size` devices, `workers` requests at a time
+    Only devices whose patch changes something are updated. The API replaces the
+    whole configuration, so each device is sent its full desired config. If any
+    device in a wave fails, the rollout stops and every device already changed
+    gets its previous full config back. Cached configs are updated in place as devices change, so the
+    fleet is not refetched afterwards.
+    
+    Yields:
+        tuple: (device_id, phase: "apply" or "rollback", success: bool, message: str)
+        as each request finishes
+    """
+    pending = [item for item in plan if item["patch"] and not item["error"]]
+    applied = []
+    try:
+        with write_pool(workers) as (executor, session):
+            update = attach_script_run_ctx(update_device_config)
+            for wave_start in range(0, len(pending), wave_size):
+                wave = pending[wave_start:wave_start + wave_size]
+                futures = {
+                    executor.submit(update, item["device_id"], item["desired"], session): item
+                    for item in wave
+                }
+                failed = False
+                for future in as_completed(futures):
+                    item = futures[future]
+                    success, message, status_code = future.result()
+                    if success:
+                        applied.append(item)
+                        store_rollout_config(item["device_id"], item["desired"])
+                    failed = failed or not success
+                    yield (item["device_id"], "apply", success, message)
+                
+                if failed:
+                    # Put every changed device back the way it was, newest wave first
+                    futures = {
+                        executor.submit(update, item["device_id"], item["current"], session): item
+                        for item in reversed(applied)
+                    }
+                    for future in as_completed(futures):
+                        item = futures[future]
+                        success, message, status_code = future.result()
+                        # A device that could not be rolled back keeps the new config in the cache
+                        if success:
+                            store_rollout_config(item["device_id"], item["current"])
+                        yield (item["device_id"], "rollback", success, message)
+                    return
+    finally:
+        get_device_detail_loader().forget(item["device_id"] for item in applied)
+
+# ============================================================================
+# CACHE WARM-UP
+# ============================================================================
+
+# Device page time range preloaded for the most viewed devices (the page's default)
+WARMUP_TELEMETRY_RANGE = timedelta(hours=24)
+
+class DeviceViewCounts:
+    """
+    How often each device page has been opened
+    Saved to `path` after every view so the boot warm-up still knows which
+    devices are popular after a restart
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.counts.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Error loading device view counts: {e}")
+
+    def record(self, device_id):
+        with self._lock:
+            self.counts[device_id] += 1
+            try:
+                with open(self.path, "w") as f:
+                    json.dump(self.counts, f)
+            except OSError as e:
+                print(f"Error saving device view counts: {e}")
+
+    def most_viewed(self, n):
+        """Return up to `n` device IDs, most viewed first"""
+        with self._lock:
+            return [device_id for device_id, count in self.counts.most_common(n)]
+
+
+@st.cache_resource(show_spinner=False)
+def get_device_view_counts():
+    """Device page view counts shared by all sessions"""
+    return DeviceViewCounts(os.environ.get('DEVICE_VIEWS_FILE', 'device_views.json'))
+
+def warm_caches(top_devices=5, timeout=60):
+    """
+    Fill the shared caches that the first page views would otherwise populate
+    Loads the sidebar count, dashboard panels, every Devices table row, and the
+    config and default-range telemetry of the `top_devices` most viewed devices
+    Waits at most `timeout` seconds for the per-device requests
+    Returns the number of seconds taken
+    """
+    started = time.monotonic()
+    endpoint = os.environ.get('API_ENDPOINT', 'http://127.0.0.1:8000/')
+    breaker = get_circuit_breakers()["api"]
+    
+    # Sidebar and dashboard panels
+    fetch_device_count()
+    fetch_system_metrics()
+    get_notification_feed()
+    records = fetch_device_records() or []
+    fetch_site_weather([DEFAULT_WEATHER_SITE] + [get_device_site(config) for device_id, config in records])
+    
+    # Devices table rows, submitted to the same loader the page reads from
+    loader = get_device_detail_loader()
+    futures = [loader.submit(endpoint, breaker, device_id, config) for device_id, config in records]
+    
+    # Device pages; fall back to the first devices listed if nothing has been viewed yet
+    device_ids = get_device_view_counts().most_viewed(top_devices) or [device_id for device_id, config in records[:top_devices]]
+    
+    # Only rollups are worth preloading; raw windows move on every TELEMETRY_WINDOW_ALIGN step
+    resolution = choose_rollup_resolution(WARMUP_TELEMETRY_RANGE)
+    end_time = datetime.now()
+    start_time = end_time - WARMUP_TELEMETRY_RANGE
+    executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix="cache-warmup")
+    for device_id in device_ids:
+        futures.append(executor.submit(fetch_device_config, device_id))
+        if resolution is not None:
+            futures.append(executor.submit(load_telemetry_rollup, device_id, start_time, end_time, resolution))
+    
+    done, not_done = wait(futures, timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+    
+    for future in done:
+        if future.exception():
+            print(f"Error warming cache: {future.exception()}")
+    if not_done:
+        print(f"Cache warm-up timed out with {len(not_done)} requests outstanding")
+    
+    return time.monotonic() - started
+
+# ============================================================================
+# SNAPSHOT EXPORT
+# ============================================================================
+
+EXPORT_FORMATS = ("parquet", "csv")
+
+def write_partitioned(df, root, partition_cols, file_name, file_format="parquet"):
+    """
+    Write a DataFrame as a Hive-style partitioned dataset
+    Rows are split on `partition_cols` into root/col=value/.../file_name.<format>;
+    the partition columns themselves are not repeated inside the files.
+    Existing files with other names are left alone, so repeated snapshots add up.
+    Returns the list of paths written
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{file_format}'")
+    if file_format == "parquet" and pa is None:
+        raise ValueError("Parquet export needs pyarrow; install it or use CSV")
+    
+    paths = []
+    for values, part in df.groupby(partition_cols, sort=True):
+        values = values if isinstance(values, tuple) else (values,)
+        directory = os.path.join(root, *(f"{col}={value}" for col, value in zip(partition_cols, values)))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{file_name}.{file_format}")
+        part = part.drop(columns=partition_cols)
+        if file_format == "parquet":
+            part.to_parquet(path, index=False)
+        else:
+            part.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+def export_snapshot(output_dir, start_time, end_time, device_ids=None, file_format="parquet",
+                    telemetry=True, workers=FLEET_FETCH_WORKERS):
+    """
+    Write a fleet snapshot and the fleet's telemetry for [start_time, end_time] to disk
+    Uses the dashboard's own pipeline: fetch_device_list for the fleet table and
+    fetch_telemetry_data + process_telemetry_data for each device, `workers` devices at a time.
+    
+    Layout (one file per run, named after the snapshot time):
+        fleet/snapshot_date=YYYY-MM-DD/fleet-<time>.<format>
+        telemetry/device_id=<id>/date=YYYY-MM-DD/telemetry-<time>.<format>
+    Telemetry dates are UTC record dates.
+    
+    Returns:
+        tuple: (success: bool, paths: list, message: str); success is False if
+        the fleet list or any device's telemetry could not be fetched, or if
+        any of `device_ids` is not in the fleet
+    """
+    snapshot_time = pd.Timestamp.now(tz="UTC")
+    file_stamp = snapshot_time.strftime("%Y%m%dT%H%M%SZ")
+    errors = []
+    
+    fleet = fetch_device_list()
+    if fleet.empty and fetch_device_records() is None:
+        return (False, [], "Could not fetch the device list")
+    if device_ids:
+        known = set(fleet["DEVICE_ID"])
+        errors += [f"{device_id}: not in the fleet" for device_id in dict.fromkeys(device_ids) if device_id not in known]
+        fleet = fleet[fleet["DEVICE_ID"].isin(device_ids)]
+    fleet = fleet.assign(snapshot_time=snapshot_time, snapshot_date=snapshot_time.strftime("%Y-%m-%d"))
+    paths = write_partitioned(fleet, os.path.join(output_dir, "fleet"), ["snapshot_date"], f"fleet-{file_stamp}", file_format)
+    
+    if telemetry:
+        def fetch(device_id):
+            success, data, message = fetch_telemetry_data(device_id, start_time, end_time)
+            return success, (process_telemetry_data(data) if success else data), message
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(fetch, device_id): device_id for device_id in fleet["DEVICE_ID"]}
+            for future in as_completed(futures):
+                device_id = futures[future]
+                success, df, message = future.result()
+                if not success:
+                    errors.append(f"{device_id}: {message}")
+                    continue
+                if df.empty:
+                    continue
+                
+                df = df.assign(device_id=device_id, date=df["timestamp"].dt.tz_convert("UTC").dt.strftime("%Y-%m-%d"))
+                paths += write_partitioned(
+                    df, os.path.join(output_dir, "telemetry"), ["device_id", "date"], f"telemetry-{file_stamp}", file_format
+                )
+    
+    if errors:
+        return (False, paths, f"{len(errors)} device(s) failed: " + "; ".join(errors))
+    return (True, paths, f"Wrote {len(paths)} file(s) for {len(fleet)} device(s)")
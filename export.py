@@ -0,0 +1,67 @@
+"""
+Export fleet and telemetry snapshots without a browser
+Runs the dashboard's fetch pipeline from backend.py (same API calls, caching
+and concurrency) and writes partitioned Parquet or CSV files, e.g. for a
+nightly cron job:
+
+    python export.py --output exports --hours 24
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+def parse_time(value):
+    """Read an ISO 8601 date or datetime given on the command line"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date or datetime: {value}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write fleet and telemetry snapshots to partitioned files")
+    parser.add_argument("--output", default=os.environ.get("EXPORT_DIR", "exports"),
+                        help="Directory the fleet/ and telemetry/ datasets are written under (default: %(default)s)")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet",
+                        help="File format; parquet needs pyarrow (default: %(default)s)")
+    parser.add_argument("--hours", type=float, default=24,
+                        help="Telemetry window ending now, in hours (default: %(default)s)")
+    parser.add_argument("--start", type=parse_time, help="Telemetry window start, local time (overrides --hours)")
+    parser.add_argument("--end", type=parse_time, help="Telemetry window end, local time (default: now)")
+    parser.add_argument("--device", action="append", dest="devices", metavar="DEVICE_ID",
+                        help="Only export this device (repeatable; default: every device)")
+    parser.add_argument("--workers", type=int, default=None, help="Devices fetched at once")
+    parser.add_argument("--fleet-only", action="store_true", help="Skip telemetry, only write the fleet snapshot")
+    args = parser.parse_args(argv)
+    
+    import backend
+    
+    end_time = args.end or datetime.now()
+    start_time = args.start or end_time - timedelta(hours=args.hours)
+    if start_time >= end_time:
+        parser.error("the telemetry window must end after it starts")
+    
+    try:
+        success, paths, message = backend.export_snapshot(
+            args.output, start_time, end_time,
+            device_ids=args.devices,
+            file_format=args.format,
+            telemetry=not args.fleet_only,
+            workers=args.workers or backend.FLEET_FETCH_WORKERS,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    
+    print(message)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
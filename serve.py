@@ -0,0 +1,51 @@
+"""
+Start the dashboard with warm caches
+Runs the same server as `streamlit run app.py` (extra arguments are passed
+through), then fills the shared caches inside the server process and writes
+WARMUP_READY_FILE. The Docker healthcheck waits for that file, so the first
+real page view is served from cache.
+"""
+import os
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+from streamlit import runtime
+from streamlit.web import cli
+
+# Load environment variables from .env file
+load_dotenv()
+
+READY_FILE = os.environ.get('WARMUP_READY_FILE', '/tmp/dashboard-ready')
+
+
+def warm_when_ready():
+    """Wait for the Streamlit runtime, warm the caches, then mark the server ready"""
+    # Caches created before the runtime exists would not be shared with sessions
+    while not runtime.exists():
+        time.sleep(0.1)
+
+    try:
+        if os.environ.get('CACHE_WARMUP', 'true').lower() in ('1', 'true', 'yes'):
+            from backend import warm_caches
+            top_devices = int(os.environ.get('WARMUP_TOP_DEVICES', '5'))
+            elapsed = warm_caches(top_devices=top_devices)
+            print(f"Cache warm-up finished in {elapsed:.1f}s")
+    except Exception as e:
+        # A failed warm-up only costs speed, the server still reports ready
+        print(f"Error warming caches: {e}")
+    finally:
+        with open(READY_FILE, "w") as f:
+            f.write(str(time.time()))
+
+
+if __name__ == "__main__":
+    # A file left over from a previous run would report ready too early
+    if os.path.exists(READY_FILE):
+        os.remove(READY_FILE)
+
+    threading.Thread(target=warm_when_ready, name="cache-warmup", daemon=True).start()
+
+    sys.argv = ["streamlit", "run", os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"), *sys.argv[1:]]
+    sys.exit(cli.main())
@@ -0,0 +1,154 @@
+import os
+import pandas as pd
+import streamlit as st
+
+from backend import (
+    DEFAULT_WEATHER_SITE,
+    fetch_device_records,
+    fetch_notifications,
+    fetch_site_weather,
+    fetch_system_metrics,
+    get_circuit_breakers,
+    get_data_cache,
+    get_device_site,
+    show_degraded_notice,
+    weather_cell,
+)
+
+# Refresh button
+col_title, col_refresh = st.columns([6, 1])
+with col_title:
+    st.markdown("### Dashboard")
+with col_refresh:
+    if st.button("🔄 Refresh", key="refresh_dashboard"):
+        get_data_cache().clear()
+        st.rerun()
+
+st.markdown("---")
+
+# Each panel is a fragment that refreshes on its own cadence, so a slow
+# source only delays its own panel and auto-refresh skips the rest of the script
+@st.fragment(run_every="5m")
+def weather_panel():
+    # Weather Header
+    # The home site and every device site are fetched together in one request
+    device_sites = [get_device_site(config) for device_id, config in (fetch_device_records() or [])]
+    site_weather = fetch_site_weather([DEFAULT_WEATHER_SITE] + device_sites)
+    weather_data = site_weather[0]
+    show_degraded_notice("weather", weather_data["temperature"] != "--")
+
+    st.markdown(f"""
+        <div class="weather-header">
+            <div style="display: flex; justify-content: space-between; align-items: center;">
+                <div>
+                    <span style="font-size: 42px; font-weight: bold;">☀️ {weather_data['temperature']}°C</span>
+                    <span style="margin-left: 15px; font-size: 16px;">{weather_data['condition']}</span>
+                </div>
+                <div style="display: flex; gap: 25px; align-items: center; font-size: 15px;">
+                    <div>💨 {weather_data['wind_speed']} km/h</div>
+                    <div>🌧️ {weather_data['precipitation']}%</div>
+                    <div>💧 Humidity {weather_data['humidity']}%</div>
+                </div>
+                <div style="text-align: right;">
+                    <div style="font-size: 12px; opacity: 0.9;">Location</div>
+                    <div style="font-weight: bold; font-size: 15px;">{weather_data['location']}</div>
+                </div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Conditions at each device site, one row per forecast grid cell
+    home_cell = weather_cell(DEFAULT_WEATHER_SITE["latitude"], DEFAULT_WEATHER_SITE["longitude"])
+    site_rows = {}
+    for site, weather in zip(device_sites, site_weather[1:]):
+        cell = weather_cell(site["latitude"], site["longitude"])
+        if cell == home_cell:
+            continue
+        row = site_rows.setdefault(cell, {
+            "LOCATION": [],
+            "DEVICES": 0,
+            "TEMPERATURE (°C)": weather["temperature"],
+            "CONDITION": weather["condition"],
+            "WIND (km/h)": weather["wind_speed"],
+            "PRECIPITATION": weather["precipitation"],
+        })
+        row["DEVICES"] += 1
+        if site["name"] not in row["LOCATION"]:
+            row["LOCATION"].append(site["name"])
+
+    if site_rows:
+        with st.expander(f"Weather at {len(site_rows)} other site(s)"):
+            site_df = pd.DataFrame(site_rows.values())
+            site_df["LOCATION"] = site_df["LOCATION"].str.join(", ")
+            st.dataframe(site_df, width='stretch', hide_index=True)
+
+weather_panel()
+
+@st.fragment(run_every="2s")
+def notifications_panel():
+    # Reads the in-memory ntfy feed, so frequent reruns are cheap
+    # Recent Notifications Section
+    st.markdown("### Recent Notifications")
+    notifications_df = fetch_notifications()
+    show_degraded_notice("ntfy", not notifications_df.empty)
+    st.dataframe(
+        notifications_df,
+        width='stretch',
+        hide_index=True,
+        height=220
+    )
+
+notifications_panel()
+
+@st.fragment(run_every="10s")
+def system_state_panel():
+    # System State Section
+    st.markdown("**System State**")
+
+    # Fetch metrics data from Glances
+    metrics = fetch_system_metrics()
+    show_degraded_notice("glances", get_circuit_breakers()["glances"].last_snapshot("metrics") is not None)
+
+    # Create 3 columns for metrics
+    col1, col2, col3 = st.columns(3)
+
+    # Metric 1: Disk Space Usage
+    with col1:
+        st.markdown("<small>Disk Space Usage</small>", unsafe_allow_html=True)
+        disk = metrics["disk"]
+        if disk["total_gb"] > 0:
+            st.markdown(f"### {disk['percentage']:.1f}% <small>of {disk['total_gb']:.0f} GB</small>", unsafe_allow_html=True)
+            st.progress(disk['percentage'] / 100)
+        else:
+            st.markdown("### --")
+            st.markdown("<small>:orange[Glances unavailable]</small>", unsafe_allow_html=True)
+
+    # Metric 2: Memory Usage
+    with col2:
+        st.markdown("<small>Memory Usage</small>", unsafe_allow_html=True)
+        mem = metrics["memory"]
+        if mem["total_gb"] > 0:
+            st.markdown(f"### {mem['percentage']:.1f}% <small>of {mem['total_gb']:.1f} GB</small>", unsafe_allow_html=True)
+            st.progress(mem['percentage'] / 100)
+        else:
+            st.markdown("### --")
+            st.markdown("<small>:orange[Glances unavailable]</small>", unsafe_allow_html=True)
+
+    # Metric 3: CPU Load
+    with col3:
+        st.markdown("<small>CPU Load</small>", unsafe_allow_html=True)
+        cpu = metrics["cpu"]
+        if cpu["percentage"] > 0:
+            st.markdown(f"### {cpu['percentage']:.1f}%", unsafe_allow_html=True)
+            # Color coding based on load
+            color = "green" if cpu["percentage"] < 60 else "orange" if cpu["percentage"] < 80 else "red"
+            st.markdown(f"<small>:{color}[Current load]</small>", unsafe_allow_html=True)
+        else:
+            st.markdown("### --")
+            st.markdown("<small>:orange[Glances unavailable]</small>", unsafe_allow_html=True)
+    
+    # Link to Glances web interface
+    glances_url = os.environ.get('GLANCES_ENDPOINT', 'http://localhost:61208')
+    st.markdown(f"[📊 View Detailed System Stats]({glances_url})")
+
+system_state_panel()
@@ -0,0 +1,305 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+from backend import (
+    HEARTBEAT_GAP_FACTOR,
+    LIVE_TAIL_INTERVAL,
+    TELEMETRY_WINDOW_ALIGN,
+    ROLLUP_RESOLUTIONS,
+    attach_script_run_ctx,
+    choose_rollup_resolution,
+    classify_fleet_health,
+    convert_df_to_csv,
+    fetch_device_config,
+    fetch_new_telemetry,
+    fetch_site_weather,
+    fetch_telemetry_data,
+    get_data_cache,
+    device_health_settings,
+    get_device_site,
+    get_device_view_counts,
+    get_telemetry_rollups,
+    get_telemetry_stats,
+    heartbeat_gaps,
+    load_telemetry_rollup,
+    process_telemetry_data,
+    show_degraded_notice,
+)
+
+device_id = st.query_params.get("device_id") or st.session_state.get("device_id")
+if not device_id:
+    st.info("Select a device from the Devices page to view its details.")
+    st.stop()
+# Keep the device in the URL so the page can be bookmarked and reloaded
+st.query_params["device_id"] = device_id
+
+# Counted once per visit; the boot warm-up preloads the most viewed devices
+if st.session_state.get("counted_device_view") != device_id:
+    st.session_state.counted_device_view = device_id
+    get_device_view_counts().record(device_id)
+
+# Device page header
+col_title, col_live, col_refresh = st.columns([5, 1, 1])
+with col_title:
+    st.markdown(f"### Device {device_id}")
+with col_live:
+    live = st.toggle("Live", key="live_tail", help="Poll for new telemetry and append it to the charts")
+with col_refresh:
+    if st.button("🔄 Refresh", key="refresh_device_detail"):
+        get_data_cache().clear()
+        st.rerun()
+
+# Time range options
+time_ranges = {
+    "Last 1 Hour": timedelta(hours=1),
+    "Last 6 Hours": timedelta(hours=6),
+    "Last 12 Hours": timedelta(hours=12),
+    "Last 24 Hours": timedelta(hours=24),
+    "Last 7 Days": timedelta(days=7),
+    "Last 30 Days": timedelta(days=30)
+}
+
+selected_range = st.selectbox("Time Range", list(time_ranges.keys()), index=3)
+time_delta = time_ranges[selected_range]
+
+# Calculate time range, aligned so concurrent viewers share one cached fetch
+end_time = datetime.fromtimestamp((int(time.time()) // TELEMETRY_WINDOW_ALIGN + 1) * TELEMETRY_WINDOW_ALIGN)
+start_time = end_time - time_delta
+
+# Long ranges are served from rollups, short ones from raw records
+resolution = choose_rollup_resolution(time_delta)
+
+def metric_chart(plot_df, flagged):
+    """Line chart of one metric, with the anomalies flagged by the rolling statistics marked in red"""
+    if flagged.empty:
+        st.line_chart(plot_df, width="stretch")
+        return
+    
+    lines = plot_df.reset_index().melt("timestamp", var_name="series", value_name="value").dropna()
+    chart = alt.Chart(lines).mark_line().encode(
+        x=alt.X("timestamp:T", title=None),
+        y=alt.Y("value:Q", title=None),
+        color=alt.Color("series:N", title=None),
+    )
+    points = alt.Chart(flagged).mark_point(color="red", filled=True, size=60).encode(
+        x="timestamp:T", y="value:Q", tooltip=["timestamp:T", "kind:N", "value:Q"]
+    )
+    st.altair_chart(chart + points, width="stretch")
+
+def rolling_caption(metric, stats_summary):
+    """Caption with a metric's current rolling statistics, if it has any"""
+    stats = stats_summary.get(metric)
+    if stats and stats['count']:
+        st.caption(
+            f"Last {stats['count']} records: mean {stats['mean']:.2f} · std {stats['std']:.2f} · "
+            f"min {stats['min']:.2f} · max {stats['max']:.2f}"
+        )
+
+def show_partial_rollup(view, fraction):
+    """Draw the slices loaded so far while the rest of a wide range is fetched"""
+    with partial_placeholder.container():
+        st.progress(fraction, text=f"Loaded {fraction:.0%} of the selected range...")
+        if not view.empty:
+            st.line_chart(view.xs('mean', axis=1, level=1), width="stretch")
+
+# Fetch device config (for location) and telemetry data concurrently
+with st.spinner("Loading telemetry data..."):
+    # The worker shares this run's context so the cached functions can use it
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        config_future = executor.submit(attach_script_run_ctx(fetch_device_config), device_id)
+        if resolution is None:
+            success, telemetry_data, message = fetch_telemetry_data(device_id, start_time, end_time)
+        else:
+            # Runs on this thread so partial results can be drawn as slices arrive
+            partial_placeholder = st.empty()
+            success, telemetry_data, message = load_telemetry_rollup(
+                device_id, start_time, end_time, resolution, on_progress=show_partial_rollup
+            )
+            partial_placeholder.empty()
+        config_success, config, config_message = config_future.result()
+
+location = config.get('location', 'Unknown') if config_success else 'Unknown'
+health_settings = device_health_settings(config if config_success else {})
+show_degraded_notice("api", success or config_success)
+
+# Local conditions at the device's site (shares the dashboard's per-cell weather cache)
+local_weather = fetch_site_weather([get_device_site(config if config_success else {})])[0]
+st.markdown(
+    f"<small>🌤️ Local weather: {local_weather['temperature']}°C, {local_weather['condition']} · "
+    f"💨 {local_weather['wind_speed']} km/h · 🌧️ {local_weather['precipitation']} mm · "
+    f"💧 {local_weather['humidity']}%</small>",
+    unsafe_allow_html=True
+)
+if not local_weather["hourly"].empty:
+    with st.expander("Hourly forecast"):
+        st.line_chart(local_weather["hourly"].set_index("time"), width="stretch")
+
+if not success:
+    st.error(message)
+    df = pd.DataFrame()
+elif resolution is None:
+    df = process_telemetry_data(telemetry_data)
+    # Only records newer than the last ones seen are added to the rolling stats
+    get_telemetry_stats().ingest(device_id, telemetry_data)
+else:
+    # Already a rollup view with (metric, stat) columns
+    df = telemetry_data
+
+# Live mode keeps its own copy of the processed data and extends it in place.
+# It is reseeded from the full fetch when the device or range changes.
+tail_key = (device_id, selected_range, resolution)
+if not live or st.session_state.get("live_tail_key") != tail_key:
+    st.session_state.live_tail_key = tail_key
+    st.session_state.live_tail_df = df
+
+@st.fragment(run_every=LIVE_TAIL_INTERVAL if live else None)
+def telemetry_panel():
+    df = st.session_state.live_tail_df
+    
+    if live and resolution is None:
+        # Fetch only records newer than the last one shown and append them
+        since = df['timestamp'].max() if not df.empty else start_time.astimezone()
+        new_df = fetch_new_telemetry(device_id, since)
+        if not new_df.empty:
+            df = new_df if df.empty else pd.concat([df, new_df], ignore_index=True)
+            # Slide the window forward so the selected range stays bounded
+            window_start = datetime.now().astimezone() - time_delta
+            df = df[df['timestamp'] >= window_start]
+            st.session_state.live_tail_df = df
+    elif live:
+        # New records are folded into the rollups, then the window is re-read from them
+        now = datetime.now()
+        rollup_success, rollup_view, rollup_message = load_telemetry_rollup(device_id, now - time_delta, now, resolution)
+        if rollup_success:
+            df = rollup_view
+            st.session_state.live_tail_df = df
+    
+    # Reporting gaps and uptime over the window, from record times (or from
+    # the occupied buckets of a rollup, which only exist where data arrived)
+    window_end = datetime.now()
+    if resolution is None:
+        last_activity = df['timestamp'].max() if not df.empty else None
+        health = heartbeat_gaps(
+            df['timestamp'] if not df.empty else [], health_settings['report_interval'],
+            window_end - time_delta, window_end
+        )
+    else:
+        last_activity = get_telemetry_rollups().last_seen(device_id)
+        # Without a configured interval the median step between occupied buckets is used
+        report_interval = health_settings['report_interval']
+        if report_interval is not None:
+            report_interval = max(report_interval, ROLLUP_RESOLUTIONS[resolution].total_seconds())
+        health = heartbeat_gaps(df.index if not df.empty else [], report_interval, window_end - time_delta, window_end)
+    
+    # Header info in columns
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    with col1:
+        st.markdown("**Device ID**")
+        st.markdown(device_id)
+    
+    with col2:
+        st.markdown("**Location**")
+        st.markdown(location)
+    
+    with col3:
+        st.markdown("**Last Activity**")
+        if last_activity is not None:
+            st.markdown(last_activity.strftime("%Y-%m-%d %H:%M:%S"))
+        else:
+            st.markdown("--")
+    
+    with col4:
+        st.markdown("**Status**")
+        if last_activity is not None:
+            status = classify_fleet_health([last_activity], [health_settings['active_threshold']])[0]
+            st.markdown(f"{'🟢' if status == 'Active' else '🔴'} {status}")
+        else:
+            st.markdown("--")
+    
+    with col5:
+        st.markdown("**Uptime**")
+        st.markdown(f"{health['uptime']:.1%}" if health['uptime'] is not None else "--")
+    
+    # Anomalies flagged as records arrived (spikes and stuck values), within the window
+    stats_summary = get_telemetry_stats().summary(device_id)
+    anomalies = get_telemetry_stats().anomalies(device_id, since=window_end - time_delta)
+    if not anomalies.empty:
+        with st.expander(f"⚠️ Anomalies ({len(anomalies)})"):
+            st.dataframe(
+                anomalies.iloc[::-1].assign(timestamp=anomalies['timestamp'].dt.strftime("%Y-%m-%d %H:%M:%S")),
+                hide_index=True, width="stretch"
+            )
+    
+    if not health['gaps'].empty:
+        with st.expander(f"Reporting gaps ({len(health['gaps'])})"):
+            st.caption(f"Silences longer than {HEARTBEAT_GAP_FACTOR} reporting intervals (about {health['expected_interval'] / 60:.0f} min each), longest first")
+            gaps_table = health['gaps'].head(20).assign(
+                start=health['gaps']['start'].dt.strftime("%Y-%m-%d %H:%M:%S"),
+                end=health['gaps']['end'].dt.strftime("%Y-%m-%d %H:%M:%S"),
+                duration=health['gaps']['duration'].dt.round("1s").astype(str),
+            )
+            st.dataframe(gaps_table, hide_index=True, width="stretch")
+    
+    st.markdown("---")
+    
+    # Download button
+    if resolution is None and not df.empty:
+        csv_data = convert_df_to_csv(df)
+        st.download_button(
+            label="📅 Download CSV",
+            data=csv_data,
+            file_name=f"{device_id}_telemetry_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv",
+            type="primary"
+        )
+    elif not df.empty:
+        # Charts come from rollups, so raw records are only fetched for export
+        if st.button("📅 Prepare CSV", key="prepare_csv", type="primary"):
+            with st.spinner("Fetching raw telemetry..."):
+                export_success, export_data, export_message = fetch_telemetry_data(device_id, start_time, end_time)
+            
+            if export_success:
+                st.download_button(
+                    label="📅 Download CSV",
+                    data=convert_df_to_csv(process_telemetry_data(export_data)),
+                    file_name=f"{device_id}_telemetry_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    mime="text/csv"
+                )
+            else:
+                st.error(export_message)
+    
+    st.markdown("---")
+    
+    # Plots section
+    if df.empty:
+        st.info("No telemetry data available for the selected time range.")
+    elif resolution is not None:
+        st.markdown("**Telemetry Data**")
+        st.caption(f"Mean, min and max per {resolution} bucket")
+        
+        for metric in df.columns.get_level_values(0).unique():
+            st.markdown(f"#### {metric.replace('_', ' ').title()}")
+            rolling_caption(metric, stats_summary)
+            plot_df = df[metric][['mean', 'min', 'max']].dropna(how='all')
+            metric_chart(plot_df, anomalies[anomalies['metric'] == metric])
+    else:
+        st.markdown("**Telemetry Data**")
+        
+        metric_columns = [col for col in df.columns if col != 'timestamp']
+        
+        if not metric_columns:
+            st.warning("No metrics found in telemetry data")
+        else:
+            for metric in metric_columns:
+                st.markdown(f"#### {metric.replace('_', ' ').title()}")
+                rolling_caption(metric, stats_summary)
+                plot_df = df[['timestamp', metric]].copy().dropna(subset=[metric]).set_index('timestamp')
+                metric_chart(plot_df, anomalies[anomalies['metric'] == metric])
+
+telemetry_panel()
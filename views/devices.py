@@ -0,0 +1,568 @@
+import json
+import os
+import time
+from concurrent.futures import as_completed, TimeoutError as FuturesTimeoutError
+
+import streamlit as st
+
+from backend import (
+    BULK_IMPORT_RATE,
+    BULK_IMPORT_WORKERS,
+    DEVICE_TABLE_DEADLINE,
+    ROLLOUT_WAVE_SIZE,
+    ROLLOUT_WORKERS,
+    bulk_create_devices,
+    create_device,
+    delete_device,
+    fetch_device_config,
+    fetch_device_count,
+    fetch_device_records,
+    get_circuit_breakers,
+    get_data_cache,
+    get_device_detail_loader,
+    parse_device_import,
+    plan_config_rollout,
+    rollout_config,
+    show_degraded_notice,
+    update_device_config,
+    validate_device_import,
+    with_fleet_status,
+)
+
+# Device Management Page
+col_title, col_refresh = st.columns([6, 1])
+with col_title:
+    st.markdown("### Device Management")
+with col_refresh:
+    if st.button("🔄 Refresh", key="refresh_devices"):
+        get_data_cache().clear()
+        get_device_detail_loader().clear()
+        st.rerun()
+
+st.markdown("---")
+
+# Fetch device data; per-device details load in the background and
+# stream into the table below
+device_records = fetch_device_records() or []
+show_degraded_notice("api", bool(device_records))
+api_breaker = get_circuit_breakers()["api"]
+detail_loader = get_device_detail_loader()
+api_endpoint = os.environ.get('API_ENDPOINT', 'http://127.0.0.1:8000/')
+device_futures = {
+    dev_id: detail_loader.submit(api_endpoint, api_breaker, dev_id, config)
+    for dev_id, config in device_records
+}
+
+# Device Summary Metrics (from the rows that have already loaded)
+# Statuses are classified for all loaded rows in one pass, against the current time
+loaded_rows = with_fleet_status([future.result() for future in device_futures.values() if future.done()])
+pending_devices = len(device_futures) - len(loaded_rows)
+total_devices = len(device_futures)
+active_devices = sum(1 for row in loaded_rows if row['STATUS'] == 'Active')
+anomalous_devices = sum(1 for row in loaded_rows if row['ANOMALIES'])
+
+# Create 2 columns for summary metrics
+col1, col2 = st.columns(2)
+
+with col1:
+    st.markdown("<small>Total Devices</small>", unsafe_allow_html=True)
+    st.markdown(f"### {total_devices}", unsafe_allow_html=True)
+
+with col2:
+    st.markdown("<small>Active Devices</small>", unsafe_allow_html=True)
+    st.markdown(f"### {active_devices}", unsafe_allow_html=True)
+    active_percentage = (active_devices / total_devices * 100) if total_devices > 0 else 0
+    color = "green" if active_percentage >= 60 else "orange" if active_percentage >= 40 else "red"
+    st.markdown(f"<small>:{color}[{active_percentage:.1f}% of total devices]</small>", unsafe_allow_html=True)
+    if anomalous_devices:
+        st.markdown(f"<small>:orange[⚠️ {anomalous_devices} device(s) with recent anomalies]</small>", unsafe_allow_html=True)
+    if pending_devices:
+        st.markdown(f"<small>:gray[{pending_devices} device(s) still loading]</small>", unsafe_allow_html=True)
+
+st.markdown("---")
+
+# Action Buttons and Forms
+if 'show_add_form' not in st.session_state:
+    st.session_state.show_add_form = False
+if 'show_bulk_import' not in st.session_state:
+    st.session_state.show_bulk_import = False
+if 'show_rollout' not in st.session_state:
+    st.session_state.show_rollout = False
+
+col_add, col_bulk, col_rollout, col_spacer = st.columns([1, 1, 1, 3])
+with col_add:
+    if st.button("➕ Add New Device", type="primary"):
+        st.session_state.show_add_form = not st.session_state.show_add_form
+with col_bulk:
+    if st.button("📥 Bulk Import"):
+        st.session_state.show_bulk_import = not st.session_state.show_bulk_import
+with col_rollout:
+    if st.button("🚀 Config Rollout"):
+        st.session_state.show_rollout = not st.session_state.show_rollout
+
+# Add Device Form
+if st.session_state.show_add_form:
+    with st.expander("Add New Device", expanded=True):
+        with st.form(key="add_device_form"):
+            new_device_id = st.text_input(
+                "Device ID *",
+                placeholder="e.g., device_001",
+                help="Enter a unique identifier for the device"
+            )
+            
+            new_config_json = st.text_area(
+                "Configuration (JSON) *",
+                placeholder='{"location": "Backyard", "sensor_type": "temperature"}',
+                height=120,
+                help="Enter device configuration as valid JSON"
+            )
+            
+            col_submit, col_cancel = st.columns([1, 1])
+            
+            with col_submit:
+                submit_button = st.form_submit_button("Create Device", type="primary")
+            
+            with col_cancel:
+                cancel_button = st.form_submit_button("Cancel")
+            
+            if cancel_button:
+                st.session_state.show_add_form = False
+                st.rerun()
+            
+            if submit_button:
+                # Validation
+                errors = []
+                
+                # Check if device ID is empty
+                if not new_device_id or not new_device_id.strip():
+                    errors.append("Device ID is required")
+                
+                # Check if configuration is empty
+                if not new_config_json or not new_config_json.strip():
+                    errors.append("Configuration is required")
+                
+                # Validate JSON
+                config_dict = None
+                if new_config_json and new_config_json.strip():
+                    try:
+                        config_dict = json.loads(new_config_json)
+                    except json.JSONDecodeError as e:
+                        errors.append(f"Invalid JSON: {str(e)}")
+                
+                # Display errors or create device
+                if errors:
+                    for error in errors:
+                        st.error(error)
+                else:
+                    # Create device via API
+                    with st.spinner("Creating device..."):
+                        success, message, status_code = create_device(new_device_id.strip(), config_dict)
+                    
+                    if success:
+                        st.success(message)
+                        st.session_state.show_add_form = False
+                        # Refresh device list
+                        st.rerun()
+                    else:
+                        st.error(message)
+
+def import_table(import_rows, results=None):
+    """Rows for the bulk import table: validation errors, then submission results once known"""
+    results = results or {}
+    table = []
+    for number, row in enumerate(import_rows, start=1):
+        if row["errors"]:
+            result = "⚠️ " + "; ".join(row["errors"])
+        else:
+            result = results.get(row["device_id"], "Ready")
+        table.append({"Row": number, "Device ID": row["device_id"], "Result": result})
+    return table
+
+# Bulk Import
+if st.session_state.show_bulk_import:
+    with st.expander("Bulk Import Devices", expanded=True):
+        st.markdown(
+            "<small>CSV with a <code>device_id</code> column, plus a JSON <code>configuration</code> column "
+            "and/or one column per setting (e.g. <code>location</code>, <code>latitude</code>), "
+            "or a JSON list of <code>{\"device_id\": ..., \"configuration\": {...}}</code> objects.</small>",
+            unsafe_allow_html=True
+        )
+        import_file = st.file_uploader("Import file", type=["csv", "json"], key="bulk_import_file")
+        
+        col_workers, col_rate = st.columns(2)
+        with col_workers:
+            import_workers = st.number_input("Concurrent requests", min_value=1, max_value=32, value=BULK_IMPORT_WORKERS)
+        with col_rate:
+            import_rate = st.number_input("Requests per second", min_value=1, max_value=100, value=BULK_IMPORT_RATE)
+        
+        finished = st.session_state.get("bulk_import_results")
+        if import_file is not None and finished and finished["file_id"] == import_file.file_id:
+            # This file was already imported; show how each row went
+            st.markdown(f"**{finished['created']}** of {finished['submitted']} device(s) created")
+            st.dataframe(finished["table"], hide_index=True, width="stretch")
+        elif import_file is not None:
+            try:
+                import_rows = parse_device_import(import_file.getvalue(), import_file.name)
+            except (ValueError, UnicodeDecodeError) as e:
+                st.error(f"Could not read {import_file.name}: {str(e)}")
+                import_rows = []
+            
+            # Every row is checked locally, including against devices that already exist
+            validate_device_import(import_rows, [dev_id for dev_id, config in device_records])
+            ready = [row for row in import_rows if not row["errors"]]
+            st.markdown(f"**{len(ready)}** ready, **{len(import_rows) - len(ready)}** with errors")
+            
+            table_placeholder = st.empty()
+            table_placeholder.dataframe(import_table(import_rows), hide_index=True, width="stretch")
+            
+            if ready and st.button(f"Import {len(ready)} device(s)", type="primary", key="bulk_import_submit"):
+                results = {row["device_id"]: "⏳ Pending" for row in ready}
+                progress = st.progress(0.0, text=f"0 of {len(ready)} submitted")
+                created = 0
+                last_drawn = 0
+                
+                submissions = bulk_create_devices(ready, workers=int(import_workers), rate=import_rate)
+                for done, (device_id, success, message, status_code) in enumerate(submissions, start=1):
+                    results[device_id] = ("✅ " if success else "❌ ") + message
+                    created += success
+                    progress.progress(done / len(ready), text=f"{done} of {len(ready)} submitted · {created} created")
+                    # Redraw the table at most twice a second so large batches stay responsive
+                    if time.monotonic() - last_drawn > 0.5 or done == len(ready):
+                        table_placeholder.dataframe(import_table(import_rows, results), hide_index=True, width="stretch")
+                        last_drawn = time.monotonic()
+                
+                st.session_state.bulk_import_results = {
+                    "file_id": import_file.file_id,
+                    "submitted": len(ready),
+                    "created": created,
+                    "table": import_table(import_rows, results),
+                }
+                # Refresh the fleet snapshot once for the whole batch
+                fetch_device_records.clear()
+                fetch_device_count.clear()
+                st.rerun()
+
+def rollout_table(plan, results=None):
+    """Rows for the config rollout table: what changes on each device, then how applying it went"""
+    results = results or {}
+    table = []
+    for item in plan:
+        if item["error"]:
+            result = "⚠️ " + item["error"]
+        elif not item["patch"]:
+            result = "Already up to date"
+        else:
+            result = results.get(item["device_id"], "Ready")
+        patch = json.dumps(item["patch"]) if item["patch"] else "--"
+        table.append({"Device ID": item["device_id"], "Patch": patch, "Result": result})
+    return table
+
+# Config Rollout
+if st.session_state.show_rollout:
+    with st.expander("Fleet Config Rollout", expanded=True):
+        st.markdown(
+            "<small>Merge a JSON object into the configuration of every matching device. "
+            "Keys already set to the new value are left alone; <code>null</code> removes a key. "
+            "Devices are updated in waves, and a failure rolls back every device already changed.</small>",
+            unsafe_allow_html=True
+        )
+        col_pattern, col_filter = st.columns(2)
+        with col_pattern:
+            id_pattern = st.text_input("Device ID pattern", value="*", help="Wildcards allowed, e.g. device_0*")
+        with col_filter:
+            filter_text = st.text_input(
+                "Only devices with (JSON)", placeholder='{"location": "Backyard"}',
+                help="Configuration values a device must have to be included"
+            )
+        patch_text = st.text_area("Changes (JSON) *", placeholder='{"report_interval": 60}', height=100)
+        
+        col_wave, col_workers = st.columns(2)
+        with col_wave:
+            wave_size = st.number_input("Devices per wave", min_value=1, max_value=500, value=ROLLOUT_WAVE_SIZE)
+        with col_workers:
+            rollout_workers = st.number_input("Concurrent requests", min_value=1, max_value=32, value=ROLLOUT_WORKERS,
+                                              key="rollout_workers")
+        
+        errors = []
+        rollout_patch = config_filter = None
+        for label, text in (("Changes", patch_text), ("Filter", filter_text)):
+            if text and text.strip():
+                try:
+                    value = json.loads(text)
+                except json.JSONDecodeError as e:
+                    errors.append(f"{label}: invalid JSON: {str(e)}")
+                    continue
+                if not isinstance(value, dict):
+                    errors.append(f"{label} must be a JSON object")
+                elif label == "Changes":
+                    rollout_patch = value
+                else:
+                    config_filter = value
+        
+        finished = st.session_state.get("rollout_results")
+        for error in errors:
+            st.error(error)
+        if finished and finished["request"] == (id_pattern, filter_text, patch_text):
+            # This rollout already ran; show how each device went
+            if finished["failed"]:
+                st.error(f"Rollout stopped after a failure; {finished['rolled_back']} device(s) rolled back")
+            else:
+                st.success(f"{finished['updated']} device(s) updated")
+            st.dataframe(finished["table"], hide_index=True, width="stretch")
+        elif rollout_patch and not errors:
+            plan = plan_config_rollout(device_records, rollout_patch, id_pattern, config_filter)
+            to_update = [item for item in plan if item["patch"] and not item["error"]]
+            st.markdown(
+                f"**{len(plan)}** matching device(s), **{len(to_update)}** to update, "
+                f"**{len(plan) - len(to_update)}** unchanged or unavailable"
+            )
+            
+            table_placeholder = st.empty()
+            table_placeholder.dataframe(rollout_table(plan), hide_index=True, width="stretch")
+            
+            if to_update and st.button(f"Roll out to {len(to_update)} device(s)", type="primary", key="rollout_submit"):
+                results = {item["device_id"]: "⏳ Pending" for item in to_update}
+                progress = st.progress(0.0, text=f"0 of {len(to_update)} updated")
+                updated = rolled_back = 0
+                failed = False
+                last_drawn = 0
+                
+                for device_id, phase, success, message in rollout_config(plan, int(wave_size), int(rollout_workers)):
+                    if phase == "apply":
+                        results[device_id] = ("✅ " if success else "❌ ") + message
+                        updated += success
+                        failed = failed or not success
+                        progress.progress(updated / len(to_update), text=f"{updated} of {len(to_update)} updated")
+                    else:
+                        results[device_id] = "↩️ Rolled back" if success else f"❌ Rollback failed: {message}"
+                        rolled_back += success
+                    # Redraw the table at most twice a second so large rollouts stay responsive
+                    if time.monotonic() - last_drawn > 0.5:
+                        table_placeholder.dataframe(rollout_table(plan, results), hide_index=True, width="stretch")
+                        last_drawn = time.monotonic()
+                
+                for device_id, result in results.items():
+                    if result == "⏳ Pending":
+                        results[device_id] = "Skipped"
+                st.session_state.rollout_results = {
+                    "request": (id_pattern, filter_text, patch_text),
+                    "updated": updated - rolled_back,
+                    "rolled_back": rolled_back,
+                    "failed": failed,
+                    "table": rollout_table(plan, results),
+                }
+                # Cached configs were updated in place, so there is nothing to refetch
+                st.rerun()
+
+# Search Box
+search_query = st.text_input("🔍 Search by Device ID", placeholder="Enter device ID...")
+
+# Filter devices based on search
+if search_query:
+    filtered_futures = {
+        dev_id: future for dev_id, future in device_futures.items()
+        if search_query.lower() in str(dev_id).lower()
+    }
+else:
+    filtered_futures = device_futures
+
+def device_table(device_futures, summary_pending):
+    """
+    Device table whose rows fill in as their futures complete
+    Waits at most DEVICE_TABLE_DEADLINE seconds per run; devices that miss the
+    deadline show as loading and are picked up by the next fragment rerun
+    """
+    # Display device table
+    st.markdown("**Device List**")
+    
+    # Table header
+    header_cols = st.columns([3, 3, 2, 3, 1, 1])
+    with header_cols[0]:
+        st.markdown("**Device ID**")
+    with header_cols[1]:
+        st.markdown("**Last Active**")
+    with header_cols[2]:
+        st.markdown("**Status**")
+    with header_cols[3]:
+        st.markdown("**Location**")
+    with header_cols[4]:
+        st.markdown("**View**")
+    with header_cols[5]:
+        st.markdown("**Edit**")
+    
+    st.markdown("---")
+    
+    # Initialize session state for editing
+    if 'editing_device_id' not in st.session_state:
+        st.session_state.editing_device_id = None
+    
+    def fill_device_row(placeholders, device_id, row):
+        """Write a loaded device's details (with STATUS) into its row placeholders"""
+        if row['STATUS'] == "Unknown" and api_breaker.degraded:
+            # Fall back to the last good row while the API is failing
+            snapshot = api_breaker.last_snapshot(("device", device_id))
+            if snapshot:
+                row = with_fleet_status([snapshot[0]])[0]
+        
+        last_active, status, location = placeholders
+        last_active.text(row['LAST_ACTIVE'])
+        status_color = "🟢" if row['STATUS'] == "Active" else "🔴"
+        if row.get('ANOMALIES'):
+            # Flagged by the rolling statistics within the last ANOMALY_RECENT
+            status.text(f"{status_color} {row['STATUS']} ⚠️", help="Recent anomalies: " + ", ".join(row['ANOMALIES']))
+        else:
+            status.text(f"{status_color} {row['STATUS']}")
+        location.text(row['LOCATION'])
+    
+    # Create columns for table and edit buttons
+    # Detail cells start out as "loading" and are filled in below
+    row_placeholders = {}
+    for device_id in device_futures:
+        cols = st.columns([3, 3, 2, 3, 1, 1])
+        
+        with cols[0]:
+            st.text(device_id)
+        with cols[1]:
+            last_active = st.empty()
+            last_active.text("--")
+        with cols[2]:
+            status = st.empty()
+            status.text("⏳ Loading")
+        with cols[3]:
+            location = st.empty()
+            location.text("--")
+        row_placeholders[device_id] = (last_active, status, location)
+        with cols[4]:
+            if st.button("📊", key=f"view_{device_id}"):
+                st.session_state.device_id = device_id
+                st.switch_page("views/device_detail.py")
+        with cols[5]:
+            if st.button("✏️", key=f"edit_{device_id}"):
+                st.session_state.editing_device_id = device_id
+                st.rerun()
+        
+        # Show edit form if this device is being edited
+        if st.session_state.editing_device_id == device_id:
+            with st.expander("Edit Device Configuration", expanded=True):
+                # Fetch current configuration
+                success, config, message = fetch_device_config(device_id)
+                
+                if not success:
+                    st.error(message)
+                else:
+                    formatted_config = json.dumps(config, indent=2)
+                    
+                    with st.form(key=f"edit_form_{device_id}"):
+                        st.text_input("Device ID", value=device_id, disabled=True)
+                        
+                        config_text = st.text_area(
+                            "Configuration (JSON) *",
+                            value=formatted_config,
+                            height=150,
+                            help="Edit device configuration as valid JSON"
+                        )
+                        
+                        col_submit, col_cancel = st.columns([1, 1])
+                        
+                        with col_submit:
+                            submit_button = st.form_submit_button("Save Changes", type="primary")
+                        
+                        with col_cancel:
+                            cancel_button = st.form_submit_button("Cancel")
+                        
+                        if cancel_button:
+                            st.session_state.editing_device_id = None
+                            st.rerun()
+                        
+                        if submit_button:
+                            # Validation
+                            errors = []
+                            
+                            # Check if configuration is empty
+                            if not config_text or not config_text.strip():
+                                errors.append("Configuration is required")
+                            
+                            # Validate JSON
+                            config_dict = None
+                            if config_text and config_text.strip():
+                                try:
+                                    config_dict = json.loads(config_text)
+                                except json.JSONDecodeError as e:
+                                    errors.append(f"Invalid JSON: {str(e)}")
+                            
+                            # Display errors or update device
+                            if errors:
+                                for error in errors:
+                                    st.error(error)
+                            else:
+                                # Update device via API
+                                with st.spinner("Updating device..."):
+                                    success, message, status_code = update_device_config(device_id, config_dict)
+                                
+                                if success:
+                                    st.success(message)
+                                    st.session_state.editing_device_id = None
+                                    # Refresh device list
+                                    st.rerun()
+                                else:
+                                    st.error(message)
+                    
+                    # Delete button outside form
+                    st.markdown("---")
+                    
+                    # Delete modal function
+                    @st.dialog("Delete Device")
+                    def delete_device_modal(device_id):
+                        st.warning("⚠️ Are you sure you want to delete this device?")
+                        st.markdown(f"**Device ID:** `{device_id}`")
+                        st.markdown("This action **cannot be undone**.")
+                        
+                        col1, col2 = st.columns([1, 1])
+                        
+                        with col1:
+                            if st.button("🗑️ Delete", key=f"modal_confirm_{device_id}", type="primary"):
+                                # Execute delete
+                                with st.spinner("Deleting device..."):
+                                    success, message, status_code = delete_device(device_id)
+                                
+                                if success:
+                                    st.success(message)
+                                    st.session_state.editing_device_id = None
+                                    # Wait a moment for user to see success message
+                                    time.sleep(0.5)
+                                    st.rerun()
+                                else:
+                                    st.error(message)
+                        
+                        with col2:
+                            if st.button("Cancel", key=f"modal_cancel_{device_id}"):
+                                st.rerun()
+                    
+                    # Delete button to open modal
+                    if st.button("🗑️ Delete Device", key=f"delete_{device_id}"):
+                        delete_device_modal(device_id)
+    
+    # Rows that have already loaded are classified together, the rest stream
+    # into their placeholders as details arrive, up to the deadline
+    future_to_device = {future: dev_id for dev_id, future in device_futures.items()}
+    loaded = [future for future in future_to_device if future.done()]
+    for row in with_fleet_status([future.result() for future in loaded]):
+        fill_device_row(row_placeholders[row['DEVICE_ID']], row['DEVICE_ID'], row)
+    for future in loaded:
+        del future_to_device[future]
+    
+    try:
+        for future in as_completed(future_to_device, timeout=DEVICE_TABLE_DEADLINE):
+            dev_id = future_to_device[future]
+            fill_device_row(row_placeholders[dev_id], dev_id, with_fleet_status([future.result()])[0])
+    except FuturesTimeoutError:
+        pass
+    
+    if summary_pending and all(future.done() for future in device_futures.values()):
+        # Everything has loaded, refresh the summary metrics above the table
+        st.rerun()
+
+# While rows are outstanding the table reruns on its own to pick up late devices
+st.fragment(device_table, run_every=DEVICE_TABLE_DEADLINE if pending_devices else None)(
+    filtered_futures, pending_devices
+)
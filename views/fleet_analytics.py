@@ -0,0 +1,123 @@
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from backend import (
+    FLEET_RANGES,
+    fetch_fleet_matrix,
+    fleet_heatmap_image,
+    get_data_cache,
+    rank_fleet_outliers,
+    show_degraded_notice,
+)
+
+# Fleet Analytics Page
+col_title, col_refresh = st.columns([6, 1])
+with col_title:
+    st.markdown("### Fleet Analytics")
+with col_refresh:
+    if st.button("🔄 Refresh", key="refresh_fleet"):
+        get_data_cache().clear()
+        st.rerun()
+
+st.markdown("---")
+
+selected_range = st.selectbox("Time Range", list(FLEET_RANGES.keys()), index=1)
+time_delta, bucket = FLEET_RANGES[selected_range]
+
+# Align the window to whole buckets so reruns within a bucket hit the cache
+bucket_seconds = int(bucket.total_seconds())
+end_time = datetime.fromtimestamp((int(time.time()) // bucket_seconds + 1) * bucket_seconds)
+start_time = end_time - time_delta
+
+with st.spinner("Loading fleet telemetry..."):
+    fleet = fetch_fleet_matrix(start_time, end_time, bucket)
+show_degraded_notice("api", bool(fleet["metrics"]))
+
+if fleet["failed"]:
+    st.warning(f"Telemetry could not be loaded for {fleet['failed']} of {len(fleet['device_ids'])} devices.")
+
+if not fleet["metrics"]:
+    st.info("No telemetry data available for the selected time range.")
+else:
+    metric = st.selectbox(
+        "Metric",
+        sorted(fleet["metrics"].keys()),
+        format_func=lambda name: name.replace('_', ' ').title()
+    )
+    matrix = fleet["metrics"][metric]
+    device_ids = fleet["device_ids"]
+    
+    # Fleet summary metrics
+    has_data = ~np.isnan(matrix)
+    reporting_devices = int(has_data.any(axis=1).sum())
+    fleet_values = matrix[has_data]
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown("<small>Reporting Devices</small>", unsafe_allow_html=True)
+        st.markdown(f"### {reporting_devices} <small>of {len(device_ids)}</small>", unsafe_allow_html=True)
+    with col2:
+        st.markdown("<small>Fleet Mean</small>", unsafe_allow_html=True)
+        st.markdown(f"### {fleet_values.mean():.2f}" if fleet_values.size else "### --")
+    with col3:
+        st.markdown("<small>Fleet Range</small>", unsafe_allow_html=True)
+        if fleet_values.size:
+            st.markdown(f"### {fleet_values.min():.2f} – {fleet_values.max():.2f}")
+        else:
+            st.markdown("### --")
+    
+    st.markdown("---")
+    
+    # Heatmap: one row per device, one column per time bucket
+    st.markdown("**Fleet Heatmap**")
+    st.image(fleet_heatmap_image(matrix), width="stretch")
+    st.caption(
+        f"Rows are devices in list order, columns are {bucket_seconds // 60}-minute buckets from "
+        f"{fleet['buckets'][0].strftime('%Y-%m-%d %H:%M')} (left) to now (right). "
+        "Darker is higher; grey means no data."
+    )
+    
+    col_dist, col_band = st.columns(2)
+    
+    # Distribution of per-device means
+    with col_dist:
+        st.markdown("**Distribution of Device Means**")
+        ranking = rank_fleet_outliers(device_ids, matrix)
+        device_means = ranking["MEAN"].to_numpy()
+        device_means = device_means[~np.isnan(device_means)]
+        if device_means.size:
+            counts, edges = np.histogram(device_means, bins=min(20, max(1, device_means.size)))
+            labels = [f"{edge:.1f}" for edge in edges[:-1]]
+            st.bar_chart(pd.DataFrame({"Devices": counts}, index=pd.Index(labels, name=metric)))
+        else:
+            st.info("No devices reported this metric.")
+    
+    # Fleet percentiles over time
+    with col_band:
+        st.markdown("**Fleet Percentiles Over Time**")
+        reporting_buckets = has_data.any(axis=0)
+        if reporting_buckets.any():
+            percentiles = np.nanpercentile(matrix[:, reporting_buckets], [5, 50, 95], axis=0)
+            st.line_chart(pd.DataFrame(
+                {"p5": percentiles[0], "median": percentiles[1], "p95": percentiles[2]},
+                index=fleet["buckets"][reporting_buckets]
+            ))
+    
+    st.markdown("---")
+    
+    # Outlier ranking
+    st.markdown("**Outlier Ranking**")
+    st.dataframe(
+        ranking.head(20),
+        width='stretch',
+        hide_index=True,
+        column_config={
+            "MEAN": st.column_config.NumberColumn(format="%.2f"),
+            "Z_SCORE": st.column_config.NumberColumn("ROBUST Z", format="%.2f"),
+            "COVERAGE": st.column_config.ProgressColumn(format="%.0f%%", min_value=0, max_value=100),
+        }
+    )